@@ -0,0 +1,24 @@
+"""
+Event loop runner shared by the Weather Bot tutorial steps.
+
+The demos run on uvloop when it is installed and on the default asyncio loop
+otherwise. uvloop.run() creates its loop for this one call, so unlike
+uvloop.install() it leaves the global event loop policy untouched.
+"""
+
+import asyncio
+from typing import Any, Coroutine, TypeVar
+
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+_T = TypeVar("_T")
+
+
+def run_demo(main: Coroutine[Any, Any, _T]) -> _T:
+    """Runs a demo's main() coroutine, on uvloop when it is available."""
+    if uvloop is not None:
+        return uvloop.run(main)
+    return asyncio.run(main)
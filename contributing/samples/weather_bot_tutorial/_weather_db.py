@@ -0,0 +1,55 @@
+"""
+Mock weather database shared by the Weather Bot tutorial steps.
+
+The data is read-only: both the outer mapping and the per-city records are
+MappingProxyType views, so the tools built on top of it are pure and their
+results can be cached.
+"""
+
+from types import MappingProxyType
+from typing import Mapping
+
+# Characters dropped when normalizing a city name, so that "New York",
+# "new-york" and "NewYork" all resolve to the same key
+_STRIP = str.maketrans("", "", " \t-_")
+
+
+def normalize_city(city: str) -> str:
+    """Returns the WEATHER_DB key for a city name as typed by a user."""
+    return city.translate(_STRIP).lower()
+
+
+# Mock weather database with realistic data, keyed by normalized city name
+WEATHER_DB: Mapping[str, Mapping[str, str]] = MappingProxyType({
+    city: MappingProxyType(record)
+    for city, record in {
+        "newyork": {
+            "temperature": "22°C (72°F)",
+            "condition": "Partly cloudy",
+            "humidity": "65%",
+            "wind_speed": "12 km/h",
+            "location": "New York, NY"
+        },
+        "london": {
+            "temperature": "15°C (59°F)",
+            "condition": "Light rain",
+            "humidity": "78%",
+            "wind_speed": "8 km/h",
+            "location": "London, UK"
+        },
+        "tokyo": {
+            "temperature": "26°C (79°F)",
+            "condition": "Sunny",
+            "humidity": "60%",
+            "wind_speed": "6 km/h",
+            "location": "Tokyo, Japan"
+        },
+        "paris": {
+            "temperature": "18°C (64°F)",
+            "condition": "Overcast",
+            "humidity": "72%",
+            "wind_speed": "10 km/h",
+            "location": "Paris, France"
+        },
+    }.items()
+})
@@ -24,17 +24,69 @@ This step demonstrates:
 """
 
 import asyncio
+from functools import lru_cache
+import logging
 import os
+from types import MappingProxyType
+from typing import Optional
+
 from google.adk.agents import Agent
 from google.adk.sessions import InMemorySessionService
 from google.adk.runners import Runner
 from google.genai import types
 
+# Demo runner shared with the other tutorial steps
+from _event_loop import run_demo
+
 # Configure environment for ADK
 os.environ["GOOGLE_GENAI_USE_VERTEXAI"] = "False"
 
 MODEL_GEMINI_2_0_FLASH = "gemini-2.0-flash"
 
+logger = logging.getLogger(__name__)
+
+
+# Characters dropped when normalizing a city name, so that "New York",
+# "new-york" and "NewYork" all resolve to the same key.
+_STRIP = str.maketrans("", "", " \t-_")
+
+# Mock weather data, keyed by normalized city name.
+_WEATHER_DB = MappingProxyType({
+  "newyork": {
+    "status": "success",
+    "report": ("The weather in New York is sunny with a "
+               "temperature of 25°C (77°F).")
+  },
+  "london": {
+    "status": "success",
+    "report": ("It's cloudy in London with a temperature "
+               "of 15°C (59°F).")
+  },
+  "tokyo": {
+    "status": "success",
+    "report": ("Tokyo is experiencing light rain with a "
+               "temperature of 18°C (64°F).")
+  }
+})
+
+
+@lru_cache(maxsize=256)
+def _lookup_weather(city: str) -> Optional[dict]:
+  """Returns the mock weather entry for a raw city name, if there is one.
+
+  The entry is shared with _WEATHER_DB, so callers must copy it before
+  handing it out.
+  """
+  return _WEATHER_DB.get(city.translate(_STRIP).lower())
+
+
+def _unknown_city_response(city: str) -> dict:
+  return {
+    "status": "error",
+    "error_message": (f"Sorry, I don't have weather information "
+                      f"for '{city}' at the moment.")
+  }
+
 
 def get_weather(city: str) -> dict:
   """Retrieves weather report for a specified city.
@@ -47,35 +99,30 @@ def get_weather(city: str) -> dict:
   """
   print(f"--- Tool: get_weather called for city: {city} ---")
 
-  city_normalized = city.lower().replace(" ", "")
-
-  # Mock weather data
-  mock_weather_db = {
-    "newyork": {
-      "status": "success",
-      "report": ("The weather in New York is sunny with a "
-                 "temperature of 25°C (77°F).")
-    },
-    "london": {
-      "status": "success",
-      "report": ("It's cloudy in London with a temperature "
-                 "of 15°C (59°F).")
-    },
-    "tokyo": {
-      "status": "success",
-      "report": ("Tokyo is experiencing light rain with a "
-                 "temperature of 18°C (64°F).")
-    }
-  }
+  weather = _lookup_weather(city)
+  if weather is not None:
+    return dict(weather)
+  return _unknown_city_response(city)
+
+
+def get_weather_batch(cities: list[str]) -> list[dict]:
+  """Retrieves weather reports for many cities at once.
+
+  Unlike get_weather this is not exposed to the agent; it is meant for
+  benchmarking the lookup against long city lists without per-call tracing.
 
-  if city_normalized in mock_weather_db:
-    return mock_weather_db[city_normalized]
-  else:
-    return {
-      "status": "error",
-      "error_message": (f"Sorry, I don't have weather information "
-                        f"for '{city}' at the moment.")
-    }
+  Args:
+    cities (list[str]): The names of the cities.
+
+  Returns:
+    list[dict]: One weather dictionary per city, in the same order.
+  """
+  lookup = _lookup_weather
+  return [
+    dict(weather) if (weather := lookup(city)) is not None
+    else _unknown_city_response(city)
+    for city in cities
+  ]
 
 
 # Define the Weather Agent
@@ -127,12 +174,11 @@ async def setup_session_and_runner():
 
 async def call_agent_async(query, runner, user_id, session_id):
   """Sends a query to the agent and prints the final response."""
-  print(f"\n>>> User Query: {query}")
+  logger.info("\n>>> User Query: %s", query)
 
-  content = types.Content(
-    role="user",
-    parts=[types.Part(text=query)]
-  )
+  # A new Content per call: the runner stores it in the session history and
+  # may rewrite its parts, so it can't be shared between queries
+  content = types.Content(role="user", parts=[types.Part(text=query)])
 
   final_response_text = "Agent did not produce a final response"
 
@@ -149,43 +195,58 @@ async def call_agent_async(query, runner, user_id, session_id):
                                f"{event.actions.escalate}")
       break
 
-  print(f"<<< Agent Response: {final_response_text}")
+  logger.info("<<< Agent Response: %s", final_response_text)
   return final_response_text
 
 
-async def run_conversation():
-  """Run the initial conversation with the weather agent."""
-  print("\n=== Weather Bot Tutorial - Step 1: Basic Weather Agent ===")
+_CONVERSATION = (
+  "What is the weather like in London?",
+  "How about Paris?",
+  "Tell me the weather in New York",
+  "What about Tokyo?",
+)
 
-  runner, user_id, session_id = await setup_session_and_runner()
 
-  await call_agent_async(
-    "What is the weather like in London?",
-    runner=runner,
-    user_id=user_id,
-    session_id=session_id,
-  )
+async def run_conversation(parallel: bool = False):
+  """Run the initial conversation with the weather agent.
 
-  await call_agent_async(
-    "How about Paris?",
-    runner=runner,
-    user_id=user_id,
-    session_id=session_id,
-  )
+  Args:
+    parallel (bool): Send every query in its own session, concurrently. This
+      is useful for benchmarking, but the queries no longer see each other's
+      history, so follow-ups like "How about Paris?" lose their context.
+  """
+  print("\n=== Weather Bot Tutorial - Step 1: Basic Weather Agent ===")
 
-  await call_agent_async(
-    "Tell me the weather in New York",
-    runner=runner,
-    user_id=user_id,
-    session_id=session_id,
-  )
+  runner, user_id, session_id = await setup_session_and_runner()
 
-  await call_agent_async(
-    "What about Tokyo?",
-    runner=runner,
-    user_id=user_id,
-    session_id=session_id,
-  )
+  if not parallel:
+    for query in _CONVERSATION:
+      await call_agent_async(
+        query,
+        runner=runner,
+        user_id=user_id,
+        session_id=session_id,
+      )
+    return
+
+  session_ids = [f"{session_id}_{i}" for i in range(len(_CONVERSATION))]
+  await asyncio.gather(*[
+    runner.session_service.create_session(
+      app_name=runner.app_name,
+      user_id=user_id,
+      session_id=parallel_session_id,
+    )
+    for parallel_session_id in session_ids
+  ])
+  await asyncio.gather(*[
+    call_agent_async(
+      query,
+      runner=runner,
+      user_id=user_id,
+      session_id=parallel_session_id,
+    )
+    for query, parallel_session_id in zip(_CONVERSATION, session_ids)
+  ])
 
 
 def test_tool():
@@ -197,10 +258,15 @@ def test_tool():
 
 
 if __name__ == "__main__":
+  logging.basicConfig(
+    level=os.environ.get("ADK_LOG_LEVEL", "INFO"),
+    format="%(message)s",
+  )
   test_tool()
 
   try:
-    asyncio.run(run_conversation())
+    # Run the conversation, on uvloop when it is installed
+    run_demo(run_conversation())
   except KeyboardInterrupt:
     print("\nConversation interrupted by user.")
   except Exception as e:  # pylint: disable=broad-except
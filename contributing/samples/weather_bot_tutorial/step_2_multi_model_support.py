@@ -16,6 +16,7 @@ Prerequisites:
 """
 
 import asyncio
+from functools import lru_cache
 from typing import Dict, Any
 import os
 
@@ -25,6 +26,18 @@ from google.adk.models import Gemini, LiteLlm
 from google.adk.core.runners import Runner
 from google.adk.core.sessions import InMemorySessionService
 
+# Demo runner shared with the other tutorial steps
+from _event_loop import run_demo
+
+# Mock weather database shared with the other tutorial steps
+from _weather_db import WEATHER_DB, normalize_city
+
+# The error returned for unknown cities only depends on the city asked for
+_AVAILABLE_CITIES = ", ".join(data["location"] for data in WEATHER_DB.values())
+_ERROR_TEMPLATE = (
+    "Weather data not available for {city}. Available cities: " + _AVAILABLE_CITIES
+)
+
 # Reuse the weather tool from Step 1
 def get_weather(city: str) -> Dict[str, Any]:
     """
@@ -37,56 +50,55 @@ def get_weather(city: str) -> Dict[str, Any]:
         Dictionary containing weather information including temperature,
         condition, humidity, and wind speed
     """
-    # Mock weather database with realistic data
-    weather_data = {
-        "new york": {
-            "temperature": "22°C (72°F)",
-            "condition": "Partly cloudy",
-            "humidity": "65%",
-            "wind_speed": "12 km/h",
-            "location": "New York, NY"
-        },
-        "london": {
-            "temperature": "15°C (59°F)", 
-            "condition": "Light rain",
-            "humidity": "78%",
-            "wind_speed": "8 km/h",
-            "location": "London, UK"
-        },
-        "tokyo": {
-            "temperature": "26°C (79°F)",
-            "condition": "Sunny",
-            "humidity": "60%", 
-            "wind_speed": "6 km/h",
-            "location": "Tokyo, Japan"
-        }
-    }
+    # Copy so callers can't alter the cached response
+    return dict(_weather_response(city))
+
+@lru_cache(maxsize=256)
+def _weather_response(city: str) -> Dict[str, Any]:
+    """
+    Build the get_weather response for a city, shared by repeated calls.
     
-    city_lower = city.lower()
-    if city_lower in weather_data:
+    The returned dictionary is shared, so callers must copy it before
+    handing it out.
+    """
+    weather = WEATHER_DB.get(normalize_city(city))
+    if weather is not None:
         return {
             "status": "success",
-            "city": weather_data[city_lower]["location"],
-            "temperature": weather_data[city_lower]["temperature"],
-            "condition": weather_data[city_lower]["condition"],
-            "humidity": weather_data[city_lower]["humidity"],
-            "wind_speed": weather_data[city_lower]["wind_speed"]
+            "city": weather["location"],
+            "temperature": weather["temperature"],
+            "condition": weather["condition"],
+            "humidity": weather["humidity"],
+            "wind_speed": weather["wind_speed"]
         }
     else:
         return {
             "status": "error",
-            "error_message": f"Weather data not available for {city}. Available cities: New York, London, Tokyo"
+            "error_message": _ERROR_TEMPLATE.format(city=city)
         }
 
-# Model configurations
-MODEL_GEMINI_2_0_FLASH = Gemini(model="gemini-2.0-flash-exp")
-MODEL_GPT_4O = LiteLlm(model="openai/gpt-4o")
-MODEL_CLAUDE_3_SONNET = LiteLlm(model="anthropic/claude-3-sonnet-20240229")
+# Model configurations, built on first use so that only the providers that are
+# actually exercised pay for client setup
+@lru_cache(maxsize=1)
+def model_gemini() -> Gemini:
+    return Gemini(model="gemini-2.0-flash-exp")
+
+@lru_cache(maxsize=1)
+def model_gpt4() -> LiteLlm:
+    return LiteLlm(model="openai/gpt-4o")
+
+@lru_cache(maxsize=1)
+def model_claude() -> LiteLlm:
+    return LiteLlm(model="anthropic/claude-3-sonnet-20240229")
 
 # Application configuration
 APP_NAME = "weather_bot_tutorial_step2"
 SESSION_ID_MULTI_MODEL = "multi_model_demo_session"
 
+# How long to wait for a single provider before giving up on it, so that one
+# hung provider doesn't stall the whole comparison
+PROVIDER_TIMEOUT_SECONDS = 30.0
+
 def create_weather_agent(model, agent_name: str) -> Agent:
     """
     Create a weather agent with the specified model.
@@ -119,50 +131,64 @@ async def test_model_comparison():
     
     # Define models to test
     models_to_test = [
-        (MODEL_GEMINI_2_0_FLASH, "weather_agent_gemini"),
-        (MODEL_GPT_4O, "weather_agent_gpt4"),
-        (MODEL_CLAUDE_3_SONNET, "weather_agent_claude")
+        (model_gemini, "weather_agent_gemini"),
+        (model_gpt4, "weather_agent_gpt4"),
+        (model_claude, "weather_agent_claude")
     ]
     
     # Test query
     test_query = "What's the weather like in Tokyo?"
     
-    for model, agent_name in models_to_test:
-        try:
-            print(f"--- Testing with {agent_name} ---")
-            
-            # Create agent with specific model
-            agent = create_weather_agent(model, agent_name)
-            
-            # Create runner
-            runner = Runner(
-                agent=agent,
-                app_name=APP_NAME,
-                session_service=session_service
-            )
-            
-            # Test the interaction
-            result = await runner.run_async(
+    async def run_model(model_fn, agent_name: str):
+        # Create agent with specific model
+        agent = create_weather_agent(model_fn(), agent_name)
+        
+        # Create runner
+        runner = Runner(
+            agent=agent,
+            app_name=APP_NAME,
+            session_service=session_service
+        )
+        
+        # Test the interaction
+        return await asyncio.wait_for(
+            runner.run_async(
                 session_id=f"{SESSION_ID_MULTI_MODEL}_{agent_name}",
                 user_message=test_query
-            )
-            
+            ),
+            timeout=PROVIDER_TIMEOUT_SECONDS
+        )
+    
+    # Each model talks to a different provider, so query them concurrently
+    results = await asyncio.gather(
+        *[run_model(model_fn, agent_name) for model_fn, agent_name in models_to_test],
+        return_exceptions=True
+    )
+    
+    for (_, agent_name), result in zip(models_to_test, results):
+        print(f"--- Testing with {agent_name} ---")
+        
+        if not isinstance(result, Exception):
             print(f"Response from {agent_name}:")
             print(f"{result.response}")
             print()
-            
-        except Exception as e:
-            error_msg = str(e)
-            if "authentication" in error_msg.lower() or "api" in error_msg.lower():
-                print(f"❌ {agent_name}: API key not configured or invalid")
-                print(f"   Make sure to set the appropriate environment variable:")
-                if "gpt4" in agent_name:
-                    print("   export OPENAI_API_KEY='your-openai-api-key'")
-                elif "claude" in agent_name:
-                    print("   export ANTHROPIC_API_KEY='your-anthropic-api-key'")
-                print()
-            else:
-                print(f"❌ {agent_name}: Error - {error_msg}\n")
+            continue
+        
+        if isinstance(result, asyncio.TimeoutError):
+            print(f"❌ {agent_name}: No response within {PROVIDER_TIMEOUT_SECONDS:.0f}s\n")
+            continue
+        
+        error_msg = str(result)
+        if "authentication" in error_msg.lower() or "api" in error_msg.lower():
+            print(f"❌ {agent_name}: API key not configured or invalid")
+            print(f"   Make sure to set the appropriate environment variable:")
+            if "gpt4" in agent_name:
+                print("   export OPENAI_API_KEY='your-openai-api-key'")
+            elif "claude" in agent_name:
+                print("   export ANTHROPIC_API_KEY='your-anthropic-api-key'")
+            print()
+        else:
+            print(f"❌ {agent_name}: Error - {error_msg}\n")
 
 def check_api_keys():
     """
@@ -198,51 +224,64 @@ async def test_individual_models():
     # Test cases for different models
     test_cases = [
         {
-            "model": MODEL_GEMINI_2_0_FLASH,
+            "model": model_gemini,
             "name": "Gemini 2.0 Flash",
             "agent_name": "weather_agent_gemini_individual",
             "query": "Tell me about the weather in New York"
         },
         {
-            "model": MODEL_GPT_4O,
+            "model": model_gpt4,
             "name": "GPT-4o",
             "agent_name": "weather_agent_gpt4_individual", 
             "query": "What's the current weather condition in London?"
         },
         {
-            "model": MODEL_CLAUDE_3_SONNET,
+            "model": model_claude,
             "name": "Claude 3 Sonnet",
             "agent_name": "weather_agent_claude_individual",
             "query": "Can you check the weather in Tokyo for me?"
         }
     ]
     
-    for test_case in test_cases:
-        try:
-            print(f"--- {test_case['name']} ---")
-            
-            # Create agent
-            agent = create_weather_agent(test_case["model"], test_case["agent_name"])
-            
-            # Create runner
-            runner = Runner(
-                agent=agent,
-                app_name=APP_NAME,
-                session_service=session_service
-            )
-            
-            # Run test
-            result = await runner.run_async(
+    async def run_test_case(test_case: Dict[str, Any]):
+        # Create agent
+        agent = create_weather_agent(test_case["model"](), test_case["agent_name"])
+        
+        # Create runner
+        runner = Runner(
+            agent=agent,
+            app_name=APP_NAME,
+            session_service=session_service
+        )
+        
+        # Run test
+        return await asyncio.wait_for(
+            runner.run_async(
                 session_id=f"individual_test_{test_case['agent_name']}",
                 user_message=test_case["query"]
-            )
-            
-            print(f"Query: {test_case['query']}")
-            print(f"Response: {result.response}")
-            print()
-            
-        except Exception as e:
-            print(f"❌ Error with {test_case['name']}: {str(e)}\n")
+            ),
+            timeout=PROVIDER_TIMEOUT_SECONDS
+        )
+    
+    # The test cases are independent, so run them concurrently
+    results = await asyncio.gather(
+        *[run_test_case(test_case) for test_case in test_cases],
+        return_exceptions=True
+    )
+    
+    for test_case, result in zip(test_cases, results):
+        print(f"--- {test_case['name']} ---")
+        
+        if isinstance(result, asyncio.TimeoutError):
+            print(f"❌ {test_case['name']}: No response within {PROVIDER_TIMEOUT_SECONDS:.0f}s\n")
+            continue
+        if isinstance(result, Exception):
+            print(f"❌ Error with {test_case['name']}: {str(result)}\n")
+            continue
+        
+        print(f"Query: {test_case['query']}")
+        print(f"Response: {result.response}")
+        print()
 
 async def main():
     """
@@ -272,5 +311,5 @@ async def main():
     print("• Model-specific behaviors can be observed with identical inputs")
 
 if __name__ == "__main__":
-    # Run the demonstration
-    asyncio.run(main())
+    # Run the demonstration, on uvloop when it is installed
+    run_demo(main())
@@ -17,7 +17,8 @@ Prerequisites:
 """
 
 import asyncio
-from typing import Dict, Any
+from functools import lru_cache
+from typing import Dict, Any, Tuple
 import logging
 
 # ADK Core imports
@@ -26,6 +27,12 @@ from google.adk.models import Gemini
 from google.adk.core.runners import Runner
 from google.adk.core.sessions import InMemorySessionService
 
+# Demo runner shared with the other tutorial steps
+from _event_loop import run_demo
+
+# Mock weather database shared with the other tutorial steps
+from _weather_db import WEATHER_DB, normalize_city
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -37,6 +44,29 @@ MODEL_GEMINI_2_0_FLASH = Gemini(model="gemini-2.0-flash-exp")
 APP_NAME = "weather_bot_tutorial_step3"
 SESSION_ID_MULTI_AGENT = "multi_agent_demo_session"
 
+# Queries for each flow
+_GREETING_QUERIES: Tuple[str, ...] = (
+    "Hello there! I'm Alice.",
+    "Hi! Can you welcome me to your service?",
+    "Good morning! I'm new here.",
+)
+_WEATHER_QUERIES: Tuple[str, ...] = (
+    "What's the weather like in Tokyo?",
+    "Can you check the weather in London for me?",
+    "I need weather information for New York",
+)
+_FAREWELL_QUERIES: Tuple[str, ...] = (
+    "Goodbye! Thanks for your help.",
+    "I need to go now. Can you say goodbye to Bob?",
+    "Farewell! This was very helpful.",
+)
+
+# The error returned for unknown cities only depends on the city asked for
+_AVAILABLE_CITIES = ", ".join(data["location"] for data in WEATHER_DB.values())
+_ERROR_TEMPLATE = (
+    "Weather data not available for {city}. Available cities: " + _AVAILABLE_CITIES
+)
+
 # Weather tool (reused from previous steps)
 def get_weather(city: str) -> Dict[str, Any]:
     """
@@ -48,54 +78,41 @@ def get_weather(city: str) -> Dict[str, Any]:
     Returns:
         Dictionary containing weather information
     """
-    weather_data = {
-        "new york": {
-            "temperature": "22°C (72°F)",
-            "condition": "Partly cloudy",
-            "humidity": "65%",
-            "wind_speed": "12 km/h",
-            "location": "New York, NY"
-        },
-        "london": {
-            "temperature": "15°C (59°F)", 
-            "condition": "Light rain",
-            "humidity": "78%",
-            "wind_speed": "8 km/h",
-            "location": "London, UK"
-        },
-        "tokyo": {
-            "temperature": "26°C (79°F)",
-            "condition": "Sunny",
-            "humidity": "60%", 
-            "wind_speed": "6 km/h",
-            "location": "Tokyo, Japan"
-        },
-        "paris": {
-            "temperature": "18°C (64°F)",
-            "condition": "Overcast",
-            "humidity": "72%",
-            "wind_speed": "10 km/h",
-            "location": "Paris, France"
-        }
-    }
+    # Copy so callers can't alter the cached response
+    return dict(_weather_response(city))
+
+@lru_cache(maxsize=256)
+def _weather_response(city: str) -> Dict[str, Any]:
+    """
+    Build the get_weather response for a city, shared by repeated calls.
     
-    city_lower = city.lower()
-    if city_lower in weather_data:
+    The returned dictionary is shared, so callers must copy it before
+    handing it out.
+    """
+    weather = WEATHER_DB.get(normalize_city(city))
+    if weather is not None:
         return {
             "status": "success",
-            "city": weather_data[city_lower]["location"],
-            "temperature": weather_data[city_lower]["temperature"],
-            "condition": weather_data[city_lower]["condition"],
-            "humidity": weather_data[city_lower]["humidity"],
-            "wind_speed": weather_data[city_lower]["wind_speed"]
+            "city": weather["location"],
+            "temperature": weather["temperature"],
+            "condition": weather["condition"],
+            "humidity": weather["humidity"],
+            "wind_speed": weather["wind_speed"]
         }
     else:
-        available_cities = ", ".join([data["location"] for data in weather_data.values()])
         return {
             "status": "error",
-            "error_message": f"Weather data not available for {city}. Available cities: {available_cities}"
+            "error_message": _ERROR_TEMPLATE.format(city=city)
         }
 
+@lru_cache(maxsize=128)
+def _greeting_message(name: str) -> str:
+    return f"Hello {name}! Welcome to the Weather Bot service. I'm here to help you with weather information and more!"
+
+@lru_cache(maxsize=128)
+def _farewell_message(name: str) -> str:
+    return f"Goodbye {name}! Thank you for using Weather Bot. Have a wonderful day and stay safe!"
+
 # New tools for greeting and farewell agents
 def say_hello(name: str = "there") -> str:
     """
@@ -107,8 +124,8 @@ def say_hello(name: str = "there") -> str:
     Returns:
         A personalized greeting message
     """
-    logger.info(f"Greeting tool called for: {name}")
-    return f"Hello {name}! Welcome to the Weather Bot service. I'm here to help you with weather information and more!"
+    logger.info("Greeting tool called for: %s", name)
+    return _greeting_message(name)
 
 def say_goodbye(name: str = "there") -> str:
     """
@@ -120,8 +137,8 @@ def say_goodbye(name: str = "there") -> str:
     Returns:
         A personalized farewell message
     """
-    logger.info(f"Farewell tool called for: {name}")
-    return f"Goodbye {name}! Thank you for using Weather Bot. Have a wonderful day and stay safe!"
+    logger.info("Farewell tool called for: %s", name)
+    return _farewell_message(name)
 
 def create_greeting_agent() -> Agent:
     """
@@ -177,10 +194,16 @@ def create_weather_agent() -> Agent:
         tools=[get_weather]
     )
 
+@lru_cache(maxsize=1)
 def create_main_agent() -> Agent:
     """
     Create the main coordination agent that delegates to specialized sub-agents.
     
+    The agent (and its sub-agents) are built once per process, which also
+    shares their tool schemas. The sub-agent factories are not cached: an
+    agent can only have one parent, so test_individual_agents builds its own
+    standalone instances.
+    
     Returns:
         Configured main agent with sub-agent delegation
     """
@@ -205,120 +228,86 @@ def create_main_agent() -> Agent:
         sub_agents=[greeting_agent, weather_agent, farewell_agent]
     )
 
-async def test_greeting_flow():
-    """
-    Test the greeting functionality through the multi-agent system.
+# Upper bound on queries sent to the model at once by the tests below
+_MAX_CONCURRENT_QUERIES = 8
+
+async def _run_queries(runner: Runner, kind: str, queries) -> list:
     """
-    print("--- Testing Greeting Flow ---")
-    
-    session_service = InMemorySessionService()
-    main_agent = create_main_agent()
+    Run queries concurrently, each in its own session.
     
-    runner = Runner(
-        agent=main_agent,
-        app_name=APP_NAME,
-        session_service=session_service
-    )
+    Args:
+        runner: The runner to send the queries to
+        kind: Label used in the session IDs, e.g. "greeting"
+        queries: The user messages to send
     
-    test_cases = [
-        "Hello there! I'm Alice.",
-        "Hi! Can you welcome me to your service?",
-        "Good morning! I'm new here."
-    ]
+    Returns:
+        One result per query, in order, or the exception it raised
+    """
+    semaphore = asyncio.Semaphore(_MAX_CONCURRENT_QUERIES)
     
-    for i, query in enumerate(test_cases):
-        try:
-            result = await runner.run_async(
-                session_id=f"{SESSION_ID_MULTI_AGENT}_greeting_{i}",
+    async def run(i: int, query: str):
+        async with semaphore:
+            return await runner.run_async(
+                session_id=f"{SESSION_ID_MULTI_AGENT}_{kind}_{i}",
                 user_message=query
             )
-            print(f"User: {query}")
-            print(f"Bot: {result.response}")
-            print()
-        except Exception as e:
-            print(f"❌ Error in greeting test: {str(e)}\n")
+    
+    return await asyncio.gather(
+        *[run(i, query) for i, query in enumerate(queries, 1)],
+        return_exceptions=True
+    )
 
-async def test_weather_flow():
+async def test_greeting_flow(runner: Runner):
+    """
+    Test the greeting functionality through the multi-agent system.
+    """
+    print("--- Testing Greeting Flow ---")
+    
+    results = await _run_queries(runner, "greeting", _GREETING_QUERIES)
+    for query, result in zip(_GREETING_QUERIES, results):
+        if isinstance(result, Exception):
+            print(f"❌ Error in greeting test: {str(result)}\n")
+            continue
+        print(f"User: {query}")
+        print(f"Bot: {result.response}")
+        print()
+
+async def test_weather_flow(runner: Runner):
     """
     Test the weather functionality through the multi-agent system.
     """
     print("--- Testing Weather Flow ---")
     
-    session_service = InMemorySessionService()
-    main_agent = create_main_agent()
-    
-    runner = Runner(
-        agent=main_agent,
-        app_name=APP_NAME,
-        session_service=session_service
-    )
-    
-    test_cases = [
-        "What's the weather like in Tokyo?",
-        "Can you check the weather in London for me?",
-        "I need weather information for New York"
-    ]
-    
-    for i, query in enumerate(test_cases):
-        try:
-            result = await runner.run_async(
-                session_id=f"{SESSION_ID_MULTI_AGENT}_weather_{i}",
-                user_message=query
-            )
-            print(f"User: {query}")
-            print(f"Bot: {result.response}")
-            print()
-        except Exception as e:
-            print(f"❌ Error in weather test: {str(e)}\n")
+    results = await _run_queries(runner, "weather", _WEATHER_QUERIES)
+    for query, result in zip(_WEATHER_QUERIES, results):
+        if isinstance(result, Exception):
+            print(f"❌ Error in weather test: {str(result)}\n")
+            continue
+        print(f"User: {query}")
+        print(f"Bot: {result.response}")
+        print()
 
-async def test_farewell_flow():
+async def test_farewell_flow(runner: Runner):
     """
     Test the farewell functionality through the multi-agent system.
     """
     print("--- Testing Farewell Flow ---")
     
-    session_service = InMemorySessionService()
-    main_agent = create_main_agent()
-    
-    runner = Runner(
-        agent=main_agent,
-        app_name=APP_NAME,
-        session_service=session_service
-    )
-    
-    test_cases = [
-        "Goodbye! Thanks for your help.",
-        "I need to go now. Can you say goodbye to Bob?",
-        "Farewell! This was very helpful."
-    ]
-    
-    for i, query in enumerate(test_cases):
-        try:
-            result = await runner.run_async(
-                session_id=f"{SESSION_ID_MULTI_AGENT}_farewell_{i}",
-                user_message=query
-            )
-            print(f"User: {query}")
-            print(f"Bot: {result.response}")
-            print()
-        except Exception as e:
-            print(f"❌ Error in farewell test: {str(e)}\n")
+    results = await _run_queries(runner, "farewell", _FAREWELL_QUERIES)
+    for query, result in zip(_FAREWELL_QUERIES, results):
+        if isinstance(result, Exception):
+            print(f"❌ Error in farewell test: {str(result)}\n")
+            continue
+        print(f"User: {query}")
+        print(f"Bot: {result.response}")
+        print()
 
-async def test_full_conversation():
+async def test_full_conversation(runner: Runner):
     """
     Test a complete conversation that exercises all agent types.
     """
     print("--- Testing Full Conversation Flow ---")
     
-    session_service = InMemorySessionService()
-    main_agent = create_main_agent()
-    
-    runner = Runner(
-        agent=main_agent,
-        app_name=APP_NAME,
-        session_service=session_service
-    )
-    
     # Complete conversation flow
     conversation_steps = [
         "Hello! I'm Sarah and I'm planning a trip.",
@@ -342,14 +331,12 @@ async def test_full_conversation():
         except Exception as e:
             print(f"❌ Error in conversation step: {str(e)}\n")
 
-async def test_individual_agents():
+async def test_individual_agents(session_service: InMemorySessionService):
     """
     Test each sub-agent individually to verify they work correctly.
     """
     print("--- Testing Individual Agents ---")
     
-    session_service = InMemorySessionService()
-    
     # Test greeting agent directly
     print("Testing Greeting Agent:")
     greeting_agent = create_greeting_agent()
@@ -412,26 +399,35 @@ async def main():
     print("This step demonstrates how to create specialized agents and coordinate them")
     print("through a main agent that delegates tasks based on user intent.\n")
     
+    # Build the session service and the main runner once and share them across
+    # all flows; each test case uses its own session_id, so state stays isolated
+    session_service = InMemorySessionService()
+    runner = Runner(
+        agent=create_main_agent(),
+        app_name=APP_NAME,
+        session_service=session_service
+    )
+    
     # Test individual agents first
-    await test_individual_agents()
+    await test_individual_agents(session_service)
     
     print("=" * 60)
     
     # Test different flows through the main coordinating agent
-    await test_greeting_flow()
+    await test_greeting_flow(runner)
     
     print("=" * 60)
     
-    await test_weather_flow()
+    await test_weather_flow(runner)
     
     print("=" * 60)
     
-    await test_farewell_flow()
+    await test_farewell_flow(runner)
     
     print("=" * 60)
     
     # Test a complete conversation
-    await test_full_conversation()
+    await test_full_conversation(runner)
     
     print("=" * 60)
     print("✅ Step 3 Complete!")
@@ -443,5 +439,5 @@ async def main():
     print("• Each agent can have its own tools and instructions")
 
 if __name__ == "__main__":
-    # Run the demonstration
-    asyncio.run(main())
+    # Run the demonstration, on uvloop when it is installed
+    run_demo(main())
@@ -18,26 +18,54 @@ Prerequisites:
 """
 
 import asyncio
-from typing import Dict, Any, Optional
+import base64
+from collections import deque
+import copy
+from functools import lru_cache
+import json
+import os
+from typing import Dict, Any, Optional, Set
 import logging
 
+try:
+    import zstandard
+except ImportError:  # Session data compression is optional
+    zstandard = None
+
 # ADK Core imports
 from google.adk.core import Agent, ToolContext
 from google.adk.models import Gemini
 from google.adk.core.runners import Runner
 from google.adk.core.sessions import InMemorySessionService
 
+# Demo runner shared with the other tutorial steps
+from _event_loop import run_demo
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Model configuration
-MODEL_GEMINI_2_0_FLASH = Gemini(model="gemini-2.0-flash-exp")
+# Model configuration, built on first use so that importing the module (e.g. to
+# call the tools directly) doesn't set up a model client
+@lru_cache(maxsize=1)
+def _model() -> Gemini:
+    return Gemini(model="gemini-2.0-flash-exp")
 
 # Application configuration
 APP_NAME = "weather_bot_tutorial_step4"
 SESSION_ID_STATEFUL = "stateful_demo_session"
 
+# Number of recent queries kept in session state
+MAX_QUERY_HISTORY = 5
+
+# Opt-in zstd compression of large session_data payloads, for persistent
+# session backends where state size dominates I/O. It is off by default: the
+# model also sees the tool response, and the tutorial's state should stay
+# readable. Requires the optional zstandard package
+COMPRESS_SESSION_DATA = os.environ.get("WEATHER_BOT_COMPRESS_STATE") == "1"
+_COMPRESS_THRESHOLD_BYTES = 512
+_ZSTD_KEY = "zstd_b64"
+
 # Enhanced weather database with more cities and detailed information
 WEATHER_DATABASE = {
     "new york": {
@@ -102,6 +130,55 @@ WEATHER_DATABASE = {
     }
 }
 
+def _city_key(city: str) -> str:
+    """Returns the WEATHER_DATABASE key for a city name, lowering it only if needed."""
+    return city if city.islower() else city.lower()
+
+# Numeric temperatures and lowercased conditions, parsed once so the insight
+# logic doesn't re-parse the display strings on every query
+WEATHER_TEMPS_C = {
+    city: int(data["temperature"].split("°")[0])
+    for city, data in WEATHER_DATABASE.items()
+}
+WEATHER_COND_LC = {
+    city: data["condition"].lower() for city, data in WEATHER_DATABASE.items()
+}
+
+# Success responses of get_weather_stateful per city, built once so each call
+# only copies a ready-made dict
+_PUBLIC_FIELDS = (
+    "temperature", "condition", "humidity", "wind_speed",
+    "feels_like", "uv_index", "visibility"
+)
+WEATHER_PUBLIC_VIEW = {
+    city: {
+        "status": "success",
+        "city": data["location"],
+        **{field: data[field] for field in _PUBLIC_FIELDS}
+    }
+    for city, data in WEATHER_DATABASE.items()
+}
+
+# Conditions that call for an outdoor-activities suggestion
+_OUTDOOR_CONDITIONS = frozenset({"sunny", "clear skies"})
+
+# The error returned for unknown cities only depends on the city asked for
+_AVAILABLE_CITIES_STR = ", ".join(d["location"] for d in WEATHER_DATABASE.values())
+_ERR_TEMPLATE = "Weather data not available for {}. Available cities: " + _AVAILABLE_CITIES_STR
+
+@lru_cache(maxsize=128)
+def _error_response(city: str) -> Dict[str, Any]:
+    """
+    Get the error response for an unknown city, shared by repeated misses.
+    
+    The returned dictionary is shared, so callers must treat it as read-only.
+    It stays a plain dict because tool results are serialized as JSON.
+    """
+    return {
+        "status": "error",
+        "error_message": _ERR_TEMPLATE.format(city)
+    }
+
 def get_weather(city: str) -> Dict[str, Any]:
     """
     Get current weather information for a specified city (basic version).
@@ -112,7 +189,7 @@ def get_weather(city: str) -> Dict[str, Any]:
     Returns:
         Dictionary containing weather information
     """
-    city_lower = city.lower()
+    city_lower = _city_key(city)
     if city_lower in WEATHER_DATABASE:
         weather = WEATHER_DATABASE[city_lower]
         return {
@@ -124,11 +201,7 @@ def get_weather(city: str) -> Dict[str, Any]:
             "wind_speed": weather["wind_speed"]
         }
     else:
-        available_cities = ", ".join([data["location"] for data in WEATHER_DATABASE.values()])
-        return {
-            "status": "error", 
-            "error_message": f"Weather data not available for {city}. Available cities: {available_cities}"
-        }
+        return _error_response(city)
 
 def get_weather_stateful(city: str, context: ToolContext) -> Dict[str, Any]:
     """
@@ -146,53 +219,45 @@ def get_weather_stateful(city: str, context: ToolContext) -> Dict[str, Any]:
     Returns:
         Dictionary containing weather information plus personalized insights
     """
-    logger.info(f"Getting stateful weather for: {city}")
+    logger.info("Getting stateful weather for: %s", city)
     
     # Get basic weather information
-    city_lower = city.lower()
+    city_lower = _city_key(city)
     if city_lower not in WEATHER_DATABASE:
-        available_cities = ", ".join([data["location"] for data in WEATHER_DATABASE.values()])
-        return {
-            "status": "error",
-            "error_message": f"Weather data not available for {city}. Available cities: {available_cities}"
-        }
+        return _error_response(city)
     
     weather = WEATHER_DATABASE[city_lower]
     
-    # Access session state to get previous queries
-    previous_queries = context.get("previous_weather_queries", [])
-    user_preferences = context.get("user_preferences", {})
+    # Access session state to get previous queries. Everything the tool keeps
+    # lives under the output_key, so a single state read is enough
+    session_data = _unpack_session_data(context.get("session_data", None))
+    previous_queries = session_data.get("previous_weather_queries", [])
+    user_preferences = session_data.get("user_preferences", {}) or {}
+    # Sessions saved before seen_cities existed only have the query history
+    seen_cities = set(
+        session_data.get("seen_cities")
+        or (query["city"] for query in previous_queries)
+    )
     
-    # Build comprehensive weather response
-    response = {
-        "status": "success",
-        "city": weather["location"],
-        "temperature": weather["temperature"],
-        "condition": weather["condition"],
-        "humidity": weather["humidity"],
-        "wind_speed": weather["wind_speed"],
-        "feels_like": weather["feels_like"],
-        "uv_index": weather["uv_index"],
-        "visibility": weather["visibility"]
-    }
+    # Build comprehensive weather response. It is copied because the
+    # personalized fields below are added to it
+    response = dict(WEATHER_PUBLIC_VIEW[city_lower])
     
     # Add personalized insights based on previous queries
     if previous_queries:
         response["personalized_insights"] = generate_personalized_insights(
             current_city=city_lower,
             current_weather=weather,
-            previous_queries=previous_queries
+            previous_queries=previous_queries,
+            seen_cities=seen_cities
         )
         
         # Update user preferences based on query patterns
         user_preferences = update_user_preferences(
             user_preferences, 
             city_lower, 
-            weather,
             previous_queries
         )
-        
-        response["user_preferences"] = user_preferences
     
     # Prepare data to save to session state
     new_query = {
@@ -203,99 +268,174 @@ def get_weather_stateful(city: str, context: ToolContext) -> Dict[str, Any]:
         "timestamp": "current"  # In real implementation, use actual timestamp
     }
     
-    # Add current query to history
-    updated_queries = previous_queries + [new_query]
-    
-    # Keep only last 5 queries to prevent state from growing too large
-    if len(updated_queries) > 5:
-        updated_queries = updated_queries[-5:]
+    # Add current query to history, keeping only the most recent queries to
+    # prevent state from growing too large
+    history = deque(previous_queries, maxlen=MAX_QUERY_HISTORY)
+    history.append(new_query)
+    # Session state must stay JSON-serializable, so store a plain list
+    updated_queries = list(history)
+    seen_cities.add(city_lower)
     
     # This data will be automatically saved to session state due to output_key
-    response["session_data"] = {
+    response["session_data"] = _pack_session_data({
         "previous_weather_queries": updated_queries,
-        "user_preferences": user_preferences
-    }
-    
-    logger.info(f"Updated session state with {len(updated_queries)} queries")
+        # The preferences were updated in place on the dict read from state,
+        # so take one snapshot here rather than copying along the way
+        "user_preferences": copy.deepcopy(user_preferences),
+        # Stored as a list since session state must stay JSON-serializable
+        "seen_cities": sorted(seen_cities)
+    })
+    
+    logger.info("Updated session state with %d queries", len(updated_queries))
     return response
 
-def generate_personalized_insights(current_city: str, current_weather: Dict, previous_queries: list) -> list:
+def _pack_session_data(session_data: Dict[str, Any]) -> Dict[str, Any]:
     """
-    Generate personalized insights based on user's weather query history.
+    Compress session data above the size threshold, if compression is enabled.
+    
+    Args:
+        session_data: The session data to store
+        
+    Returns:
+        The session data itself, or a single-key dict with the compressed JSON
+    """
+    if not COMPRESS_SESSION_DATA or zstandard is None:
+        return session_data
+    raw = json.dumps(session_data, separators=(",", ":")).encode("utf-8")
+    if len(raw) <= _COMPRESS_THRESHOLD_BYTES:
+        return session_data
+    compressed = zstandard.compress(raw, level=3)
+    return {_ZSTD_KEY: base64.b64encode(compressed).decode("ascii")}
+
+def _unpack_session_data(session_data: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Reverse _pack_session_data.
+    
+    Args:
+        session_data: The session data as stored in state, possibly compressed
+        
+    Returns:
+        The plain session data, or an empty dict if there is none
+        
+    Raises:
+        RuntimeError: If the data is compressed and zstandard is not installed
+    """
+    if not session_data:
+        return {}
+    packed = session_data.get(_ZSTD_KEY)
+    if packed is None:
+        return session_data
+    if zstandard is None:
+        raise RuntimeError(
+            "Session data is zstd-compressed but the zstandard package is not "
+            "installed; install it with: pip install zstandard"
+        )
+    return json.loads(zstandard.decompress(base64.b64decode(packed)))
+
+def _condition_insights(current_city: str) -> list:
+    """
+    Generate the insights based on the current weather condition alone.
+    
+    Args:
+        current_city: Current city being queried, as a WEATHER_DATABASE key
+        
+    Returns:
+        List of insight strings
+    """
+    condition = WEATHER_COND_LC[current_city]
+    if condition in _OUTDOOR_CONDITIONS:
+        return ["Great weather for outdoor activities!"]
+    if "rain" in condition:
+        return ["Don't forget an umbrella if you're heading out!"]
+    return []
+
+def _comparative_insights(current_city: str, current_weather: Dict, last_query: Dict, seen_cities: Set[str]) -> list:
+    """
+    Generate the insights that compare the current query with earlier ones.
     
     Args:
-        current_city: Current city being queried
+        current_city: Current city being queried, as a WEATHER_DATABASE key
         current_weather: Current weather data
-        previous_queries: List of previous weather queries
+        last_query: The most recent previous weather query
+        seen_cities: Cities the user has queried before, as WEATHER_DATABASE keys
         
     Returns:
-        List of personalized insight strings
+        List of insight strings
     """
     insights = []
     
     # Check if user has queried this city before
-    previous_cities = [query["city"] for query in previous_queries]
-    if current_city in previous_cities:
+    if current_city in seen_cities:
         insights.append(f"You've checked weather for {current_weather['location']} before!")
     
-    # Compare temperature with previous queries
-    if previous_queries:
-        last_query = previous_queries[-1]
-        try:
-            current_temp = int(current_weather["temperature"].split("°")[0])
-            last_temp = int(last_query["temperature"].split("°")[0])
-            
-            if current_temp > last_temp + 5:
-                insights.append(f"It's significantly warmer in {current_weather['location']} compared to your last query ({last_query['location']})!")
-            elif current_temp < last_temp - 5:
-                insights.append(f"It's much cooler in {current_weather['location']} compared to your last query ({last_query['location']})!")
-        except:
-            pass  # Skip temperature comparison if parsing fails
-    
-    # Suggest based on conditions
-    if current_weather["condition"].lower() in ["sunny", "clear skies"]:
-        insights.append("Great weather for outdoor activities!")
-    elif "rain" in current_weather["condition"].lower():
-        insights.append("Don't forget an umbrella if you're heading out!")
+    # Compare temperature with the last query, skipping history entries that
+    # aren't in the database
+    last_temp = WEATHER_TEMPS_C.get(last_query["city"])
+    if last_temp is not None:
+        current_temp = WEATHER_TEMPS_C[current_city]
+        if current_temp > last_temp + 5:
+            insights.append(f"It's significantly warmer in {current_weather['location']} compared to your last query ({last_query['location']})!")
+        elif current_temp < last_temp - 5:
+            insights.append(f"It's much cooler in {current_weather['location']} compared to your last query ({last_query['location']})!")
     
     return insights
 
-def update_user_preferences(current_prefs: Dict, city: str, weather: Dict, previous_queries: list) -> Dict:
+def generate_personalized_insights(current_city: str, current_weather: Dict, previous_queries: list, seen_cities: Set[str]) -> list:
+    """
+    Generate personalized insights based on user's weather query history.
+    
+    Args:
+        current_city: Current city being queried, as a WEATHER_DATABASE key
+        current_weather: Current weather data
+        previous_queries: List of previous weather queries, must not be empty
+        seen_cities: Cities the user has queried before, as WEATHER_DATABASE keys
+        
+    Returns:
+        List of personalized insight strings
+    """
+    return _comparative_insights(
+        current_city, current_weather, previous_queries[-1], seen_cities
+    ) + _condition_insights(current_city)
+
+def update_user_preferences(current_prefs: Dict, city: str, previous_queries: list) -> Dict:
     """
     Update user preferences based on query patterns.
     
+    The preferences are updated in place: the caller owns current_prefs and
+    gets the same dictionary back.
+    
     Args:
         current_prefs: Current user preferences
         city: City being queried
-        weather: Weather data for the city
         previous_queries: Historical queries
         
     Returns:
         Updated user preferences dictionary
     """
-    prefs = current_prefs.copy()
+    prefs = current_prefs
     
     # Track favorite cities (most queried)
-    city_counts = prefs.get("city_query_counts", {})
+    city_counts = prefs.setdefault("city_query_counts", {})
     city_counts[city] = city_counts.get(city, 0) + 1
-    prefs["city_query_counts"] = city_counts
     
-    # Determine favorite city
-    if city_counts:
-        favorite_city = max(city_counts, key=city_counts.get)
-        prefs["favorite_city"] = favorite_city
+    # Determine favorite city. Counts only ever grow by one, so the queried
+    # city is the only one that can overtake the current favorite; on a tie the
+    # most recently queried city wins
+    favorite_count = city_counts.get(prefs.get("favorite_city"), 0)
+    if city_counts[city] >= favorite_count:
+        prefs["favorite_city"] = city
     
     # Track weather condition preferences
-    condition_prefs = prefs.get("condition_preferences", {})
-    condition = weather["condition"].lower()
+    condition_prefs = prefs.setdefault("condition_preferences", {})
+    condition = WEATHER_COND_LC[city]
     condition_prefs[condition] = condition_prefs.get(condition, 0) + 1
-    prefs["condition_preferences"] = condition_prefs
     
     # Update query streak
     prefs["total_queries"] = len(previous_queries) + 1
     
     return prefs
 
+@lru_cache(maxsize=1)
 def create_stateful_weather_agent() -> Agent:
     """
     Create a weather agent with session state management capabilities.
@@ -305,7 +445,7 @@ def create_stateful_weather_agent() -> Agent:
     """
     return Agent(
         name="stateful_weather_agent",
-        model=MODEL_GEMINI_2_0_FLASH,
+        model=_model(),
         instruction=(
             "You are an advanced weather assistant with memory capabilities. "
             "Use the get_weather_stateful tool to provide weather information that "
@@ -319,6 +459,7 @@ def create_stateful_weather_agent() -> Agent:
         }]
     )
 
+@lru_cache(maxsize=1)
 def create_basic_weather_agent() -> Agent:
     """
     Create a basic weather agent without state management for comparison.
@@ -328,7 +469,7 @@ def create_basic_weather_agent() -> Agent:
     """
     return Agent(
         name="basic_weather_agent",
-        model=MODEL_GEMINI_2_0_FLASH,
+        model=_model(),
         instruction=(
             "You are a basic weather assistant. Use the get_weather tool to provide "
             "weather information for cities. Be helpful and informative."
@@ -336,20 +477,34 @@ def create_basic_weather_agent() -> Agent:
         tools=[get_weather]
     )
 
-async def test_stateful_interactions():
+@lru_cache(maxsize=8)
+def _get_runner(agent_factory, session_service: InMemorySessionService) -> Runner:
     """
-    Test stateful interactions showing how the agent remembers previous queries.
-    """
-    print("=== Testing Stateful Weather Interactions ===\n")
+    Get the shared runner for an agent factory and a session service.
     
-    session_service = InMemorySessionService()
-    agent = create_stateful_weather_agent()
-    
-    runner = Runner(
-        agent=agent,
+    Args:
+        agent_factory: One of the create_*_weather_agent factories
+        session_service: The session service the runner stores sessions in
+        
+    Returns:
+        Runner for the agent built by agent_factory
+    """
+    return Runner(
+        agent=agent_factory(),
         app_name=APP_NAME,
         session_service=session_service
     )
+
+async def test_stateful_interactions(session_service: InMemorySessionService):
+    """
+    Test stateful interactions showing how the agent remembers previous queries.
+    
+    Args:
+        session_service: The session service shared by the demos in this step
+    """
+    print("=== Testing Stateful Weather Interactions ===\n")
+    
+    runner = _get_runner(create_stateful_weather_agent, session_service)
     
     # Series of queries that should build up session state
     queries = [
@@ -376,19 +531,21 @@ async def test_stateful_interactions():
         except Exception as e:
             print(f"❌ Error in query {i}: {str(e)}\n")
 
-async def test_session_persistence():
+async def test_session_persistence(session_service: InMemorySessionService):
     """
     Test that session state persists across multiple runner instances.
+    
+    Args:
+        session_service: The session service shared by the demos in this step
     """
     print("\n=== Testing Session Persistence ===\n")
     
-    session_service = InMemorySessionService()
-    
     # First interaction
+    # The runners are built directly here: using two separate instances is
+    # the point of this test. They share the cached stateful agent
     print("--- First Runner Instance ---")
-    agent1 = create_stateful_weather_agent()
     runner1 = Runner(
-        agent=agent1,
+        agent=create_stateful_weather_agent(),
         app_name=APP_NAME,
         session_service=session_service
     )
@@ -406,9 +563,8 @@ async def test_session_persistence():
     
     # Second interaction with new runner instance but same session
     print("--- Second Runner Instance (Same Session) ---")
-    agent2 = create_stateful_weather_agent()
     runner2 = Runner(
-        agent=agent2,
+        agent=create_stateful_weather_agent(),
         app_name=APP_NAME,
         session_service=session_service
     )
@@ -425,47 +581,48 @@ async def test_session_persistence():
     except Exception as e:
         print(f"❌ Error in second query: {str(e)}\n")
 
-async def compare_stateful_vs_basic():
+async def compare_stateful_vs_basic(session_service: InMemorySessionService):
     """
     Compare stateful agent vs basic agent to show the difference.
+    
+    Args:
+        session_service: The session service shared by the demos in this step
     """
     print("\n=== Comparing Stateful vs Basic Agent ===\n")
     
-    session_service = InMemorySessionService()
-    
     # Test basic agent
     print("--- Basic Agent (No State Management) ---")
-    basic_agent = create_basic_weather_agent()
-    basic_runner = Runner(
-        agent=basic_agent,
-        app_name=APP_NAME,
-        session_service=session_service
-    )
+    basic_runner = _get_runner(create_basic_weather_agent, session_service)
     
     queries = ["Weather in Tokyo?", "How about London?", "Tokyo again?"]
     
-    for i, query in enumerate(queries):
-        try:
-            result = await basic_runner.run_async(
-                session_id="basic_test",
+    # The basic agent keeps no state, so its queries are independent and can
+    # run concurrently. Each one gets its own session so that the concurrent
+    # runs don't interleave events in a shared history
+    results = await asyncio.gather(
+        *[
+            basic_runner.run_async(
+                session_id=f"basic_test_{i}",
                 user_message=query
             )
-            print(f"Basic Agent - {query}")
-            print(f"Response: {result.response}")
-            print()
-        except Exception as e:
-            print(f"❌ Basic agent error: {str(e)}\n")
+            for i, query in enumerate(queries)
+        ],
+        return_exceptions=True
+    )
+    
+    for query, result in zip(queries, results):
+        if isinstance(result, Exception):
+            print(f"❌ Basic agent error: {str(result)}\n")
+            continue
+        print(f"Basic Agent - {query}")
+        print(f"Response: {result.response}")
+        print()
     
     print("-" * 60)
     
     # Test stateful agent
     print("--- Stateful Agent (With State Management) ---")
-    stateful_agent = create_stateful_weather_agent()
-    stateful_runner = Runner(
-        agent=stateful_agent,
-        app_name=APP_NAME,
-        session_service=session_service
-    )
+    stateful_runner = _get_runner(create_stateful_weather_agent, session_service)
     
     for i, query in enumerate(queries):
         try:
@@ -505,17 +662,16 @@ async def test_tool_context_access():
     for city in cities:
         result = get_weather_stateful(city, context)
         
-        # Update context with the returned session data
+        # Update context with the returned session data, as output_key does
         if "session_data" in result:
-            for key, value in result["session_data"].items():
-                context.set(key, value)
+            context.set("session_data", result["session_data"])
         
         print(f"Query: {city}")
         print(f"Status: {result['status']}")
         if "personalized_insights" in result:
             print(f"Insights: {result['personalized_insights']}")
-        if "user_preferences" in result:
-            prefs = result["user_preferences"]
+        prefs = _unpack_session_data(result.get("session_data")).get("user_preferences")
+        if prefs:
             if "favorite_city" in prefs:
                 print(f"Favorite City: {prefs['favorite_city']}")
             print(f"Total Queries: {prefs.get('total_queries', 0)}")
@@ -529,14 +685,18 @@ async def main():
     print("This step demonstrates how ADK agents can maintain state across interactions,")
     print("providing personalized experiences based on user history.\n")
     
+    # One session service for every demo in this step; the demos keep their
+    # sessions apart by using distinct session ids
+    session_service = InMemorySessionService()
+    
     # Test stateful interactions
-    await test_stateful_interactions()
+    await test_stateful_interactions(session_service)
     
     # Test session persistence
-    await test_session_persistence()
+    await test_session_persistence(session_service)
     
     # Compare stateful vs basic approaches
-    await compare_stateful_vs_basic()
+    await compare_stateful_vs_basic(session_service)
     
     # Test direct tool context access
     await test_tool_context_access()
@@ -552,5 +712,5 @@ async def main():
     print("• Session management is handled automatically by ADK")
 
 if __name__ == "__main__":
-    # Run the demonstration
-    asyncio.run(main())
+    # Run the demonstration, on uvloop when it is installed
+    run_demo(main())
@@ -18,7 +18,9 @@ Prerequisites:
 """
 
 import asyncio
-from typing import Dict, Any, Optional
+import re
+from functools import lru_cache
+from typing import Callable, Dict, Any, Optional
 import logging
 
 # ADK Core imports
@@ -27,6 +29,9 @@ from google.adk.models import Gemini
 from google.adk.core.runners import Runner
 from google.adk.core.sessions import InMemorySessionService
 
+# Demo runner shared with the other tutorial steps
+from _event_loop import run_demo
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -70,6 +75,23 @@ WEATHER_DATABASE = {
     }
 }
 
+# The database never changes, so the list of cities quoted in error messages
+# is built once instead of on every failed lookup
+_AVAILABLE_CITIES = ", ".join(data["location"] for data in WEATHER_DATABASE.values())
+
+# Successful get_weather responses, built once per city at import
+_WEATHER_RESPONSES = {
+    city: {
+        "status": "success",
+        "city": weather["location"],
+        "temperature": weather["temperature"],
+        "condition": weather["condition"],
+        "humidity": weather["humidity"],
+        "wind_speed": weather["wind_speed"]
+    }
+    for city, weather in WEATHER_DATABASE.items()
+}
+
 def get_weather(city: str) -> Dict[str, Any]:
     """
     Get current weather information for a specified city.
@@ -80,26 +102,83 @@ def get_weather(city: str) -> Dict[str, Any]:
     Returns:
         Dictionary containing weather information
     """
-    city_lower = city.lower()
-    if city_lower in WEATHER_DATABASE:
-        weather = WEATHER_DATABASE[city_lower]
-        return {
-            "status": "success",
-            "city": weather["location"],
-            "temperature": weather["temperature"],
-            "condition": weather["condition"],
-            "humidity": weather["humidity"],
-            "wind_speed": weather["wind_speed"]
-        }
-    else:
-        available_cities = ", ".join([data["location"] for data in WEATHER_DATABASE.values()])
-        return {
-            "status": "error",
-            "error_message": f"Weather data not available for {city}. Available cities: {available_cities}"
-        }
+    response = _WEATHER_RESPONSES.get(city.lower())
+    if response is not None:
+        # Copy so callers can't alter the precomputed response
+        return response.copy()
+    return {
+        "status": "error",
+        "error_message": f"Weather data not available for {city}. Available cities: {_AVAILABLE_CITIES}"
+    }
 
 # Security callback functions
 
+def _compile_keywords(keywords) -> "re.Pattern[str]":
+    """
+    Compile keywords into one case-insensitive alternation, so a message is
+    scanned once for all of them instead of once per keyword.
+    
+    Keywords match at the start of a word and cover its inflections, so "hack"
+    matches "hacking" and "hacks" but not "shack", and "block" doesn't match
+    "snowblock".
+    
+    Keywords are tried in the given order, so list longer ones first to report
+    the most specific match. Each keyword is its own group: keywords[
+    match.lastindex - 1] is the keyword that matched, even when the matched
+    text differs from it by more than case (e.g. "ſ" matching "s").
+    """
+    alternation = "|".join(f"({re.escape(keyword)})" for keyword in keywords)
+    return re.compile(rf"\b(?:{alternation})\w*", re.IGNORECASE)
+
+_BLOCKED_MESSAGE = (
+    "🚫 Security Alert: Your request has been blocked because it contains "
+    "restricted content. Please rephrase your message without using blocked keywords."
+)
+_SUSPICIOUS_MESSAGE = (
+    "🚫 Security Alert: Your request has been blocked due to potentially "
+    "unsafe content. Please rephrase your message appropriately."
+)
+_OFFENSIVE_MESSAGE = (
+    "🚫 Content Blocked: Your message contains content that violates "
+    "our community guidelines. Please keep interactions respectful."
+)
+_SYSTEM_MESSAGE = (
+    "🚫 Access Denied: Attempts to access system information are not permitted. "
+    "Please ask weather-related questions instead."
+)
+_OFF_TOPIC_MESSAGE = (
+    "🚫 Off-Topic: This bot only provides weather information. "
+    "Please ask about weather conditions for specific cities."
+)
+
+# Keyword sets of the guardrails, kept as module constants so they are built
+# once; each is ordered longest-first for _compile_keywords
+_SUSPICIOUS_PATTERNS = (
+    "ignore instructions", "system prompt", "developer mode",
+    "jailbreak", "exploit", "override", "bypass", "hack"
+)
+_OFFENSIVE_WORDS = ("violence", "attack", "hate", "harm")
+_SYSTEM_KEYWORDS = (
+    "configuration", "instructions", "system", "prompt", "admin", "root"
+)
+_WEATHER_KEYWORDS = (
+    "temperature", "humidity", "forecast", "weather", "cloud", "rain", "wind", "sun"
+)
+
+# The blocked keyword and potentially problematic patterns, mapped to the
+# message returned when they are found
+_GUARDRAIL_MESSAGES = {
+    "block": _BLOCKED_MESSAGE,
+    **dict.fromkeys(_SUSPICIOUS_PATTERNS, _SUSPICIOUS_MESSAGE)
+}
+_GUARDRAIL_KEYWORDS = tuple(sorted(_GUARDRAIL_MESSAGES, key=len, reverse=True))
+_GUARDRAIL_RE = _compile_keywords(_GUARDRAIL_KEYWORDS)
+
+# Patterns of the strict guardrail, checked in this order
+_OFFENSIVE_RE = _compile_keywords(_OFFENSIVE_WORDS)
+_SYSTEM_RE = _compile_keywords(_SYSTEM_KEYWORDS)
+_WEATHER_RE = _compile_keywords(_WEATHER_KEYWORDS)
+
 def block_keyword_guardrail(context: ModelContext) -> Optional[str]:
     """
     Security guardrail that blocks requests containing the keyword "BLOCK".
@@ -115,32 +194,19 @@ def block_keyword_guardrail(context: ModelContext) -> Optional[str]:
         None to allow the request to proceed, or a string message to block
         the request and return the message instead
     """
-    user_message = context.user_message.lower() if context.user_message else ""
+    user_message = context.user_message or ""
     
     # Log the input validation attempt
-    logger.info(f"Validating user input: {context.user_message}")
-    
-    # Check for the blocked keyword
-    if "block" in user_message:
-        logger.warning(f"Blocked input containing keyword 'BLOCK': {context.user_message}")
-        return (
-            "🚫 Security Alert: Your request has been blocked because it contains "
-            "restricted content. Please rephrase your message without using blocked keywords."
+    logger.info("Validating user input: %s", user_message)
+    
+    # Check for the blocked keyword and other potentially problematic patterns
+    match = _GUARDRAIL_RE.search(user_message)
+    if match:
+        pattern = _GUARDRAIL_KEYWORDS[match.lastindex - 1]
+        logger.warning(
+            "Blocked input containing pattern '%s': %s", pattern, user_message
         )
-    
-    # Check for other potentially problematic patterns
-    suspicious_patterns = [
-        "hack", "exploit", "bypass", "override", "jailbreak", 
-        "ignore instructions", "system prompt", "developer mode"
-    ]
-    
-    for pattern in suspicious_patterns:
-        if pattern in user_message:
-            logger.warning(f"Blocked input containing suspicious pattern '{pattern}': {context.user_message}")
-            return (
-                f"🚫 Security Alert: Your request has been blocked due to potentially "
-                f"unsafe content. Please rephrase your message appropriately."
-            )
+        return _GUARDRAIL_MESSAGES[pattern]
     
     # Allow the request to proceed
     logger.info("Input validation passed - request allowed")
@@ -156,53 +222,62 @@ def strict_content_guardrail(context: ModelContext) -> Optional[str]:
     Returns:
         None to allow or a string message to block
     """
-    user_message = context.user_message.lower() if context.user_message else ""
+    user_message = context.user_message or ""
     
     # Block offensive language
-    offensive_words = ["hate", "violence", "attack", "harm"]
-    for word in offensive_words:
-        if word in user_message:
-            return (
-                "🚫 Content Blocked: Your message contains content that violates "
-                "our community guidelines. Please keep interactions respectful."
-            )
+    if _OFFENSIVE_RE.search(user_message):
+        return _OFFENSIVE_MESSAGE
     
     # Block attempts to extract system information
-    system_keywords = ["system", "prompt", "instructions", "configuration", "admin", "root"]
-    for keyword in system_keywords:
-        if keyword in user_message:
-            return (
-                "🚫 Access Denied: Attempts to access system information are not permitted. "
-                "Please ask weather-related questions instead."
-            )
+    if _SYSTEM_RE.search(user_message):
+        return _SYSTEM_MESSAGE
     
-    # Ensure weather-related queries
-    weather_keywords = ["weather", "temperature", "rain", "sun", "cloud", "wind", "humidity", "forecast"]
-    if not any(keyword in user_message for keyword in weather_keywords) and len(user_message.split()) > 3:
-        return (
-            "🚫 Off-Topic: This bot only provides weather information. "
-            "Please ask about weather conditions for specific cities."
-        )
+    # Ensure weather-related queries; splitting at most three times is enough
+    # to tell whether there are more than three words
+    if len(user_message.split(None, 3)) > 3 and not _WEATHER_RE.search(user_message):
+        return _OFF_TOPIC_MESSAGE
     
     return None
 
-def create_secure_weather_agent() -> Agent:
+@lru_cache(maxsize=None)
+def _make_agent(
+    name: str,
+    instruction: str,
+    guardrail: Optional[Callable[[ModelContext], Optional[str]]] = None
+) -> Agent:
     """
-    Create a weather agent with basic security guardrails.
+    Build a weather agent, reusing the instance for repeated configurations.
+    
+    Args:
+        name: The agent name
+        instruction: The system instruction for the agent
+        guardrail: Optional before_model_callback used to validate input
     
     Returns:
-        Agent with block keyword security callback
+        Agent with the get_weather tool and the given guardrail, if any
     """
+    callbacks = {"before_model_callback": guardrail} if guardrail else {}
     return Agent(
-        name="secure_weather_agent",
+        name=name,
         model=MODEL_GEMINI_2_0_FLASH,
-        instruction=(
-            "You are a secure weather assistant. Provide helpful weather information "
-            "for cities using the get_weather tool. Always be polite and professional. "
-            "You have security measures in place to ensure safe interactions."
-        ),
+        instruction=instruction,
         tools=[get_weather],
-        before_model_callback=block_keyword_guardrail
+        **callbacks
+    )
+
+def create_secure_weather_agent() -> Agent:
+    """
+    Create a weather agent with basic security guardrails.
+    
+    Returns:
+        Agent with block keyword security callback
+    """
+    return _make_agent(
+        "secure_weather_agent",
+        "You are a secure weather assistant. Provide helpful weather information "
+        "for cities using the get_weather tool. Always be polite and professional. "
+        "You have security measures in place to ensure safe interactions.",
+        block_keyword_guardrail
     )
 
 def create_strict_secure_weather_agent() -> Agent:
@@ -212,16 +287,12 @@ def create_strict_secure_weather_agent() -> Agent:
     Returns:
         Agent with strict content security callback
     """
-    return Agent(
-        name="strict_secure_weather_agent",
-        model=MODEL_GEMINI_2_0_FLASH,
-        instruction=(
-            "You are a strictly controlled weather assistant focused exclusively on "
-            "weather information. Provide weather data using the get_weather tool. "
-            "Maintain professional interactions within the scope of weather services."
-        ),
-        tools=[get_weather],
-        before_model_callback=strict_content_guardrail
+    return _make_agent(
+        "strict_secure_weather_agent",
+        "You are a strictly controlled weather assistant focused exclusively on "
+        "weather information. Provide weather data using the get_weather tool. "
+        "Maintain professional interactions within the scope of weather services.",
+        strict_content_guardrail
     )
 
 def create_unsecured_weather_agent() -> Agent:
@@ -231,31 +302,47 @@ def create_unsecured_weather_agent() -> Agent:
     Returns:
         Basic agent without security measures
     """
-    return Agent(
-        name="unsecured_weather_agent",
-        model=MODEL_GEMINI_2_0_FLASH,
-        instruction=(
-            "You are a weather assistant. Provide weather information for cities "
-            "using the get_weather tool. Be helpful and responsive to user requests."
-        ),
-        tools=[get_weather]
-        # No before_model_callback - no input validation
+    # No guardrail - no input validation
+    return _make_agent(
+        "unsecured_weather_agent",
+        "You are a weather assistant. Provide weather information for cities "
+        "using the get_weather tool. Be helpful and responsive to user requests."
     )
 
-async def test_blocked_content():
+# Upper bound on queries sent to the model at once by the tests below
+_MAX_CONCURRENT_QUERIES = 8
+
+async def _run_queries(runner: Runner, kind: str, queries) -> list:
     """
-    Test the security guardrail with content that should be blocked.
+    Run queries concurrently, each in its own session.
+    
+    Args:
+        runner: The runner to send the queries to
+        kind: Label used in the session IDs, e.g. "blocked"
+        queries: The user messages to send
+    
+    Returns:
+        One result per query, in order, or the exception it raised
     """
-    print("=== Testing Blocked Content ===\n")
+    semaphore = asyncio.Semaphore(_MAX_CONCURRENT_QUERIES)
     
-    session_service = InMemorySessionService()
-    agent = create_secure_weather_agent()
+    async def run(i: int, query: str):
+        async with semaphore:
+            return await runner.run_async(
+                session_id=f"{SESSION_ID_SECURITY}_{kind}_{i}",
+                user_message=query
+            )
     
-    runner = Runner(
-        agent=agent,
-        app_name=APP_NAME,
-        session_service=session_service
+    return await asyncio.gather(
+        *[run(i, query) for i, query in enumerate(queries, 1)],
+        return_exceptions=True
     )
+
+async def test_blocked_content(runner: Runner):
+    """
+    Test the security guardrail with content that should be blocked.
+    """
+    print("=== Testing Blocked Content ===\n")
     
     # Test cases that should be blocked
     blocked_queries = [
@@ -267,33 +354,21 @@ async def test_blocked_content():
     ]
     
     print("Testing queries that should be blocked by security guardrails:")
-    for i, query in enumerate(blocked_queries, 1):
-        try:
-            result = await runner.run_async(
-                session_id=f"{SESSION_ID_SECURITY}_blocked_{i}",
-                user_message=query
-            )
-            print(f"Query {i}: {query}")
-            print(f"Response: {result.response}")
-            print("-" * 50)
-        except Exception as e:
-            print(f"❌ Error in blocked query {i}: {str(e)}\n")
+    results = await _run_queries(runner, "blocked", blocked_queries)
+    for i, (query, result) in enumerate(zip(blocked_queries, results), 1):
+        if isinstance(result, Exception):
+            print(f"❌ Error in blocked query {i}: {str(result)}\n")
+            continue
+        print(f"Query {i}: {query}")
+        print(f"Response: {result.response}")
+        print("-" * 50)
 
-async def test_allowed_content():
+async def test_allowed_content(runner: Runner):
     """
     Test the security guardrail with content that should be allowed.
     """
     print("\n=== Testing Allowed Content ===\n")
     
-    session_service = InMemorySessionService()
-    agent = create_secure_weather_agent()
-    
-    runner = Runner(
-        agent=agent,
-        app_name=APP_NAME,
-        session_service=session_service
-    )
-    
     # Test cases that should be allowed
     allowed_queries = [
         "What's the weather like in Tokyo?",
@@ -304,33 +379,21 @@ async def test_allowed_content():
     ]
     
     print("Testing queries that should be allowed through security guardrails:")
-    for i, query in enumerate(allowed_queries, 1):
-        try:
-            result = await runner.run_async(
-                session_id=f"{SESSION_ID_SECURITY}_allowed_{i}",
-                user_message=query
-            )
-            print(f"Query {i}: {query}")
-            print(f"Response: {result.response}")
-            print("-" * 50)
-        except Exception as e:
-            print(f"❌ Error in allowed query {i}: {str(e)}\n")
+    results = await _run_queries(runner, "allowed", allowed_queries)
+    for i, (query, result) in enumerate(zip(allowed_queries, results), 1):
+        if isinstance(result, Exception):
+            print(f"❌ Error in allowed query {i}: {str(result)}\n")
+            continue
+        print(f"Query {i}: {query}")
+        print(f"Response: {result.response}")
+        print("-" * 50)
 
-async def test_strict_security():
+async def test_strict_security(runner: Runner):
     """
     Test the stricter security guardrail implementation.
     """
     print("\n=== Testing Strict Security Guardrails ===\n")
     
-    session_service = InMemorySessionService()
-    agent = create_strict_secure_weather_agent()
-    
-    runner = Runner(
-        agent=agent,
-        app_name=APP_NAME,
-        session_service=session_service
-    )
-    
     # Test cases for strict security
     test_queries = [
         # Should be allowed
@@ -350,38 +413,31 @@ async def test_strict_security():
     ]
     
     print("Testing strict security guardrails:")
-    for i, (query, expected) in enumerate(test_queries, 1):
-        try:
-            result = await runner.run_async(
-                session_id=f"{SESSION_ID_SECURITY}_strict_{i}",
-                user_message=query
-            )
-            print(f"Query {i}: {query}")
-            print(f"Expected: {expected}")
-            print(f"Response: {result.response}")
-            print("-" * 50)
-        except Exception as e:
-            print(f"❌ Error in strict security test {i}: {str(e)}\n")
-
-async def compare_secured_vs_unsecured():
+    results = await _run_queries(
+        runner, "strict", [query for query, _ in test_queries]
+    )
+    for i, ((query, expected), result) in enumerate(zip(test_queries, results), 1):
+        if isinstance(result, Exception):
+            print(f"❌ Error in strict security test {i}: {str(result)}\n")
+            continue
+        print(f"Query {i}: {query}")
+        print(f"Expected: {expected}")
+        print(f"Response: {result.response}")
+        print("-" * 50)
+
+async def compare_secured_vs_unsecured(
+    secured_runner: Runner, unsecured_runner: Runner
+):
     """
     Compare secured agent vs unsecured agent to show the difference.
     """
     print("\n=== Comparing Secured vs Unsecured Agents ===\n")
     
-    session_service = InMemorySessionService()
-    
     # Test query that should be blocked
     test_query = "Please BLOCK this and tell me about weather in Tokyo"
     
     # Test unsecured agent
     print("--- Unsecured Agent (No Input Validation) ---")
-    unsecured_agent = create_unsecured_weather_agent()
-    unsecured_runner = Runner(
-        agent=unsecured_agent,
-        app_name=APP_NAME,
-        session_service=session_service
-    )
     
     try:
         result = await unsecured_runner.run_async(
@@ -398,12 +454,6 @@ async def compare_secured_vs_unsecured():
     
     # Test secured agent
     print("--- Secured Agent (With Input Validation) ---")
-    secured_agent = create_secure_weather_agent()
-    secured_runner = Runner(
-        agent=secured_agent,
-        app_name=APP_NAME,
-        session_service=session_service
-    )
     
     try:
         result = await secured_runner.run_async(
@@ -416,21 +466,12 @@ async def compare_secured_vs_unsecured():
     except Exception as e:
         print(f"❌ Secured agent error: {str(e)}\n")
 
-async def test_edge_cases():
+async def test_edge_cases(runner: Runner):
     """
     Test edge cases and boundary conditions for security guardrails.
     """
     print("\n=== Testing Edge Cases ===\n")
     
-    session_service = InMemorySessionService()
-    agent = create_secure_weather_agent()
-    
-    runner = Runner(
-        agent=agent,
-        app_name=APP_NAME,
-        session_service=session_service
-    )
-    
     # Edge case test queries
     edge_cases = [
         # Empty/minimal inputs
@@ -450,18 +491,15 @@ async def test_edge_cases():
     ]
     
     print("Testing edge cases for security guardrails:")
-    for i, (query, description) in enumerate(edge_cases, 1):
-        try:
-            result = await runner.run_async(
-                session_id=f"{SESSION_ID_SECURITY}_edge_{i}",
-                user_message=query
-            )
-            print(f"Edge Case {i}: {description}")
-            print(f"Query: '{query}'")
-            print(f"Response: {result.response}")
-            print("-" * 40)
-        except Exception as e:
-            print(f"❌ Error in edge case {i}: {str(e)}\n")
+    results = await _run_queries(runner, "edge", [query for query, _ in edge_cases])
+    for i, ((query, description), result) in enumerate(zip(edge_cases, results), 1):
+        if isinstance(result, Exception):
+            print(f"❌ Error in edge case {i}: {str(result)}\n")
+            continue
+        print(f"Edge Case {i}: {description}")
+        print(f"Query: '{query}'")
+        print(f"Response: {result.response}")
+        print("-" * 40)
 
 async def main():
     """
@@ -471,20 +509,39 @@ async def main():
     print("This step demonstrates how to implement input validation and security")
     print("guardrails using before_model_callback to protect against malicious input.\n")
     
+    # Build the session service and one runner per agent once and share them
+    # across all tests; each query uses its own session_id, so state stays isolated
+    session_service = InMemorySessionService()
+    secure_runner = Runner(
+        agent=create_secure_weather_agent(),
+        app_name=APP_NAME,
+        session_service=session_service
+    )
+    strict_runner = Runner(
+        agent=create_strict_secure_weather_agent(),
+        app_name=APP_NAME,
+        session_service=session_service
+    )
+    unsecured_runner = Runner(
+        agent=create_unsecured_weather_agent(),
+        app_name=APP_NAME,
+        session_service=session_service
+    )
+    
     # Test blocked content
-    await test_blocked_content()
+    await test_blocked_content(secure_runner)
     
     # Test allowed content
-    await test_allowed_content()
+    await test_allowed_content(secure_runner)
     
     # Test strict security
-    await test_strict_security()
+    await test_strict_security(strict_runner)
     
     # Compare secured vs unsecured
-    await compare_secured_vs_unsecured()
+    await compare_secured_vs_unsecured(secure_runner, unsecured_runner)
     
     # Test edge cases
-    await test_edge_cases()
+    await test_edge_cases(secure_runner)
     
     print("\n" + "=" * 60)
     print("✅ Step 5 Complete!")
@@ -498,5 +555,5 @@ async def main():
     print("• Security measures should be tested with both positive and negative cases")
 
 if __name__ == "__main__":
-    # Run the demonstration
-    asyncio.run(main())
+    # Run the demonstration, on uvloop when it is installed
+    run_demo(main())
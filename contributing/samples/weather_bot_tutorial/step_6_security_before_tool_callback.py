@@ -18,7 +18,9 @@ Prerequisites:
 """
 
 import asyncio
-from typing import Dict, Any, Optional
+import re
+from functools import lru_cache, wraps
+from typing import Callable, Dict, Any, Optional, Tuple
 import logging
 
 # ADK Core imports
@@ -27,17 +29,84 @@ from google.adk.models import Gemini
 from google.adk.core.runners import Runner
 from google.adk.core.sessions import InMemorySessionService
 
+# Demo runner shared with the other tutorial steps
+from _event_loop import run_demo
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Model configuration
+# Model configuration, shared by every agent below
 MODEL_GEMINI_2_0_FLASH = Gemini(model="gemini-2.0-flash-exp")
 
 # Application configuration
 APP_NAME = "weather_bot_tutorial_step6"
 SESSION_ID_TOOL_SECURITY = "tool_security_demo_session"
 
+# Queries for test_paris_blocking, which should all be blocked
+_PARIS_QUERIES: Tuple[str, ...] = (
+    "What's the weather in Paris?",
+    "Can you check Paris weather?",
+    "I need weather information for Paris, France",
+    "How's the weather in PARIS today?",
+    "paris weather please",
+)
+
+# Queries for test_allowed_cities, which should all be allowed
+_ALLOWED_QUERIES: Tuple[str, ...] = (
+    "What's the weather in Tokyo?",
+    "Can you check London weather?",
+    "How's New York weather today?",
+    "I need weather for Berlin please",
+)
+
+# Scenarios for test_advanced_security_features, as (query, expected) pairs
+_ADVANCED_CASES: Tuple[Tuple[str, str], ...] = (
+    # Basic weather should work
+    ("What's the weather in Tokyo?", "Should work - basic weather"),
+    
+    # Detailed weather without forecast should work
+    ("Give me detailed weather for London", "Should work - detailed weather"),
+    
+    # Paris should be blocked
+    ("What's the weather in Paris?", "Should block - Paris restriction"),
+    
+    # Moscow should be blocked (geographic restriction)
+    ("Check weather in Moscow", "Should block - geographic restriction"),
+    
+    # Suspicious city names should be blocked
+    ("Weather for admin-city", "Should block - suspicious pattern"),
+    ("Check debug-location weather", "Should block - suspicious pattern"),
+)
+
+# Potentially malicious inputs for test_malicious_input_protection
+_MALICIOUS_QUERIES: Tuple[str, ...] = (
+    "Weather for Tokyo'; DROP TABLE users; --",
+    "Check weather in London<script>alert('xss')</script>",
+    "Weather in javascript:alert('hack')",
+    "City weather: eval('malicious_code')",
+    "exec('rm -rf /') weather in Tokyo",
+)
+
+# Edge cases for test_tool_argument_validation, as (query, description) pairs
+_EDGE_CASES: Tuple[Tuple[str, str], ...] = (
+    # Empty/null inputs
+    ("What's the weather in ?", "Empty city name"),
+    ("Weather for '' please", "Empty string city"),
+    
+    # Very long inputs
+    ("Weather in " + "Tokyo" * 50, "Very long city name"),
+    
+    # Special characters
+    ("Weather in Tokyo; rm -rf /", "City with command injection"),
+    ("Weather in Tokyo' OR '1'='1", "City with SQL injection pattern"),
+    
+    # Case sensitivity
+    ("Weather in PARIS", "Paris in uppercase"),
+    ("Weather in Paris", "Paris in normal case"),
+    ("Weather in paris", "Paris in lowercase"),
+)
+
 # Weather database (expanded for demonstration)
 WEATHER_DATABASE = {
     "new york": {
@@ -90,6 +159,24 @@ WEATHER_DATABASE = {
     }
 }
 
+# The database never changes, so the list of cities quoted in error messages
+# is built once instead of on every failed lookup
+_AVAILABLE_CITIES = ", ".join(data["location"] for data in WEATHER_DATABASE.values())
+
+# Successful get_weather responses, built once per city at import
+_WEATHER_RESPONSES = {
+    city: {
+        "status": "success",
+        "city": weather["location"],
+        "country": weather["country"],
+        "temperature": weather["temperature"],
+        "condition": weather["condition"],
+        "humidity": weather["humidity"],
+        "wind_speed": weather["wind_speed"]
+    }
+    for city, weather in WEATHER_DATABASE.items()
+}
+
 def get_weather(city: str) -> Dict[str, Any]:
     """
     Get current weather information for a specified city.
@@ -100,24 +187,14 @@ def get_weather(city: str) -> Dict[str, Any]:
     Returns:
         Dictionary containing weather information
     """
-    city_lower = city.lower()
-    if city_lower in WEATHER_DATABASE:
-        weather = WEATHER_DATABASE[city_lower]
-        return {
-            "status": "success",
-            "city": weather["location"],
-            "country": weather["country"],
-            "temperature": weather["temperature"],
-            "condition": weather["condition"],
-            "humidity": weather["humidity"],
-            "wind_speed": weather["wind_speed"]
-        }
-    else:
-        available_cities = ", ".join([data["location"] for data in WEATHER_DATABASE.values()])
-        return {
-            "status": "error",
-            "error_message": f"Weather data not available for {city}. Available cities: {available_cities}"
-        }
+    response = _WEATHER_RESPONSES.get(city.lower())
+    if response is not None:
+        # Copy so callers (including get_detailed_weather) can extend the result
+        return response.copy()
+    return {
+        "status": "error",
+        "error_message": f"Weather data not available for {city}. Available cities: {_AVAILABLE_CITIES}"
+    }
 
 def get_detailed_weather(city: str, include_forecast: bool = False) -> Dict[str, Any]:
     """
@@ -132,18 +209,16 @@ def get_detailed_weather(city: str, include_forecast: bool = False) -> Dict[str,
     Returns:
         Dictionary containing detailed weather information
     """
-    basic_weather = get_weather(city)
+    # get_weather returns a new dict, so it can be extended in place
+    detailed_info = get_weather(city)
     
-    if basic_weather["status"] == "error":
-        return basic_weather
+    if detailed_info["status"] == "error":
+        return detailed_info
     
     # Add detailed information
-    detailed_info = {
-        **basic_weather,
-        "detailed": True,
-        "timestamp": "2024-01-15T10:00:00Z",
-        "source": "Weather API v2.0"
-    }
+    detailed_info["detailed"] = True
+    detailed_info["timestamp"] = "2024-01-15T10:00:00Z"
+    detailed_info["source"] = "Weather API v2.0"
     
     if include_forecast:
         # Forecast data requires higher permissions
@@ -157,6 +232,118 @@ def get_detailed_weather(city: str, include_forecast: bool = False) -> Dict[str,
 
 # Security callback functions
 
+# Messages returned by the guardrails when they block a tool call
+_PARIS_BLOCKED_MESSAGE = (
+    "🚫 Access Restricted: Weather information for Paris is currently "
+    "unavailable due to data licensing restrictions. Please try another city."
+)
+_FORECAST_DENIED_MESSAGE = (
+    "🚫 Permission Denied: Forecast data requires premium access. "
+    "Basic weather information is available without the forecast option."
+)
+_PARIS_UNAVAILABLE_MESSAGE = (
+    "🚫 Access Restricted: Paris weather data is temporarily unavailable. "
+    "Please try: London, Tokyo, New York, or Berlin."
+)
+_INVALID_CITY_MESSAGE = (
+    "🚫 Invalid City: Please provide a valid city name for weather information."
+)
+_RATE_LIMIT_MESSAGE = (
+    "🚫 Rate Limit Exceeded: Too many requests. Please wait before making more queries."
+)
+_MALICIOUS_MESSAGE = (
+    "🚫 Security Alert: Malicious content detected in request. "
+    "Please provide valid city names for weather queries."
+)
+_GUARDRAIL_ERROR_MESSAGE = (
+    "🚫 Security Check Failed: This request could not be validated. "
+    "Please try again with a valid city name."
+)
+_GEO_RESTRICTED_MESSAGE = (
+    "🚫 Geographic Restriction: Weather data for {city} is "
+    "not available in your region due to access restrictions."
+)
+
+def _safe_guardrail(
+    guardrail: Callable[[ToolContext], Optional[str]]
+) -> Callable[[ToolContext], Optional[str]]:
+    """
+    Make a guardrail fail closed: the tool call is blocked if its arguments
+    are malformed or the guardrail itself raises, instead of letting the
+    error skip validation.
+    """
+    @wraps(guardrail)
+    def wrapper(context: ToolContext) -> Optional[str]:
+        if not isinstance(context.tool_args, dict):
+            logger.warning("Blocked %s with malformed args: %r", context.tool_name, context.tool_args)
+            return _GUARDRAIL_ERROR_MESSAGE
+        try:
+            return guardrail(context)
+        except Exception:
+            logger.exception("Guardrail %s failed; blocking tool call", guardrail.__name__)
+            return _GUARDRAIL_ERROR_MESSAGE
+    return wrapper
+
+def _compile_patterns(patterns) -> "re.Pattern[str]":
+    """
+    Compile literal patterns into one case-insensitive alternation, so a tool
+    argument is scanned once for all of them instead of once per pattern.
+    """
+    return re.compile("|".join(map(re.escape, patterns)), re.IGNORECASE)
+
+def _city_key(tool_args: Dict[str, Any]) -> str:
+    """
+    Returns the normalized city name from tool arguments, so "Paris",
+    " PARIS " and "Paris, France" all give "paris".
+    """
+    return tool_args.get("city", "").split(",", 1)[0].strip().casefold()
+
+# Cities subject to geographic restrictions, on top of the Paris block
+_RESTRICTED_CITIES = frozenset({"moscow"})
+
+def _check_geo(city: str, paris_message: str) -> Optional[str]:
+    """
+    Geographic restrictions shared by the guardrails.
+    
+    Args:
+        city: Normalized city name, as returned by _city_key
+        paris_message: The guardrail's own message for Paris requests
+        
+    Returns:
+        None if the city is allowed, or the message to block with
+    """
+    if city == "paris":
+        return paris_message
+    # Additional geographic restrictions could be added to _RESTRICTED_CITIES
+    if city in _RESTRICTED_CITIES:
+        return _GEO_RESTRICTED_MESSAGE.format(city=city.title())
+    return None
+
+# City names that look like probing rather than real locations
+_SUSPICIOUS_RE = _compile_patterns(["admin", "system", "test", "debug"])
+
+# Tools whose city argument is subject to the geographic restrictions
+_WEATHER_TOOLS = frozenset({"get_weather", "get_detailed_weather"})
+
+# String arguments of the weather tools, the only ones that can carry
+# user-controlled text
+_STRING_TOOL_ARGS = {
+    "get_weather": ("city",),
+    "get_detailed_weather": ("city",),
+}
+
+# Injection attempts blocked even by the permissive guardrail
+_MALICIOUS_RE = _compile_patterns([
+    "drop table", "delete from", "insert into", "update set",
+    "script>", "javascript:", "eval(", "exec("
+])
+
+# Tool calls allowed per session by the advanced guardrail, counted in the
+# session state under _REQUEST_COUNT_KEY
+_RATE_LIMIT = 10
+_REQUEST_COUNT_KEY = "tool_security_request_count"
+
+@_safe_guardrail
 def block_paris_tool_guardrail(context: ToolContext) -> Optional[str]:
     """
     Tool security guardrail that blocks weather queries for Paris.
@@ -174,33 +361,22 @@ def block_paris_tool_guardrail(context: ToolContext) -> Optional[str]:
     tool_name = context.tool_name
     tool_args = context.tool_args
     
-    logger.info(f"Validating tool execution: {tool_name} with args: {tool_args}")
+    logger.debug("Validating tool execution: %s with args: %s", tool_name, tool_args)
     
     # Check if this is a weather-related tool
-    if tool_name in ["get_weather", "get_detailed_weather"]:
-        city_arg = tool_args.get("city", "").lower()
-        
-        # Block requests for Paris
-        if "paris" in city_arg:
-            logger.warning(f"Blocked weather query for Paris: {tool_args}")
-            return (
-                "🚫 Access Restricted: Weather information for Paris is currently "
-                "unavailable due to data licensing restrictions. Please try another city."
-            )
-        
-        # Additional geographic restrictions could be added here
-        restricted_cities = ["moscow"]  # Example: block certain regions
-        if any(restricted in city_arg for restricted in restricted_cities):
-            logger.warning(f"Blocked weather query for restricted city: {tool_args}")
-            return (
-                f"🚫 Geographic Restriction: Weather data for {city_arg.title()} is "
-                "not available in your region due to access restrictions."
-            )
+    if tool_name in _WEATHER_TOOLS:
+        # Block requests for Paris and other restricted cities
+        city = _city_key(tool_args)
+        message = _check_geo(city, _PARIS_BLOCKED_MESSAGE)
+        if message:
+            logger.warning("Blocked weather query for %s: %s", city, tool_args)
+            return message
     
     # Allow tool execution
     logger.info("Tool execution validation passed")
     return None
 
+@_safe_guardrail
 def advanced_tool_security_guardrail(context: ToolContext) -> Optional[str]:
     """
     Advanced tool security guardrail with multiple validation layers.
@@ -214,46 +390,45 @@ def advanced_tool_security_guardrail(context: ToolContext) -> Optional[str]:
     tool_name = context.tool_name
     tool_args = context.tool_args
     
-    # Layer 1: Tool-specific validation
+    # The layers run cheapest first, so a denied call exits before the more
+    # expensive checks
+    
+    # Layer 1: Rate limiting per session
+    # The count lives in the session state, so each session has its own budget
+    request_count = context.state.get(_REQUEST_COUNT_KEY, 0) + 1
+    context.state[_REQUEST_COUNT_KEY] = request_count
+    if request_count > _RATE_LIMIT:
+        logger.warning("Blocked %s at layer 1 (rate limit): %d calls", tool_name, request_count)
+        return _RATE_LIMIT_MESSAGE
+    
+    is_weather_tool = tool_name in _WEATHER_TOOLS
+    
+    # Layer 2: Geographic restrictions
+    if is_weather_tool:
+        # Block Paris (as per original requirement) and other restricted cities
+        message = _check_geo(_city_key(tool_args), _PARIS_UNAVAILABLE_MESSAGE)
+        if message:
+            logger.warning("Blocked %s at layer 2 (geographic): %s", tool_name, tool_args)
+            return message
+    
+    # Layer 3: Tool-specific validation
     if tool_name == "get_detailed_weather":
         # Check if forecast is requested
         if tool_args.get("include_forecast", False):
             # In a real implementation, check user permissions here
             # For demo purposes, block forecast access
             logger.warning("Blocked forecast access - insufficient permissions")
-            return (
-                "🚫 Permission Denied: Forecast data requires premium access. "
-                "Basic weather information is available without the forecast option."
-            )
+            return _FORECAST_DENIED_MESSAGE
     
-    # Layer 2: Geographic restrictions
-    if tool_name in ["get_weather", "get_detailed_weather"]:
-        city = tool_args.get("city", "").lower()
-        
-        # Block Paris (as per original requirement)
-        if "paris" in city:
-            return (
-                "🚫 Access Restricted: Paris weather data is temporarily unavailable. "
-                "Please try: London, Tokyo, New York, or Berlin."
-            )
-        
-        # Block requests with suspicious patterns
-        suspicious_patterns = ["admin", "system", "test", "debug"]
-        if any(pattern in city for pattern in suspicious_patterns):
-            return (
-                "🚫 Invalid City: Please provide a valid city name for weather information."
-            )
-    
-    # Layer 3: Rate limiting (simulation)
-    # In real implementation, track requests per session/user
-    session_requests = getattr(context, 'session_request_count', 0)
-    if session_requests > 10:  # Simulated rate limit
-        return (
-            "🚫 Rate Limit Exceeded: Too many requests. Please wait before making more queries."
-        )
+    # Layer 4: Suspicious patterns, the only scan over the city name. It reads
+    # the raw argument, since the key drops everything after the first comma
+    if is_weather_tool and _SUSPICIOUS_RE.search(tool_args.get("city", "")):
+        logger.warning("Blocked %s at layer 4 (suspicious): %s", tool_name, tool_args)
+        return _INVALID_CITY_MESSAGE
     
     return None
 
+@_safe_guardrail
 def permissive_tool_guardrail(context: ToolContext) -> Optional[str]:
     """
     A more permissive guardrail that only blocks clearly malicious requests.
@@ -266,27 +441,26 @@ def permissive_tool_guardrail(context: ToolContext) -> Optional[str]:
     """
     tool_args = context.tool_args
     
+    # Only scan the arguments that can carry user text; for tools we don't know,
+    # scan every string argument
+    arg_names = _STRING_TOOL_ARGS.get(context.tool_name)
+    if arg_names is None:
+        values = tool_args.values()
+    else:
+        values = [tool_args.get(name) for name in arg_names]
+    
     # Only block obviously malicious patterns
-    if tool_args:
-        for key, value in tool_args.items():
-            if isinstance(value, str):
-                value_lower = value.lower()
-                
-                # Block injection attempts
-                malicious_patterns = [
-                    "drop table", "delete from", "insert into", "update set",
-                    "script>", "javascript:", "eval(", "exec("
-                ]
-                
-                if any(pattern in value_lower for pattern in malicious_patterns):
-                    logger.error(f"Blocked malicious pattern in tool args: {tool_args}")
-                    return (
-                        "🚫 Security Alert: Malicious content detected in request. "
-                        "Please provide valid city names for weather queries."
-                    )
+    for value in values:
+        # Block injection attempts
+        if isinstance(value, str) and _MALICIOUS_RE.search(value):
+            logger.error("Blocked malicious pattern in tool args: %s", tool_args)
+            return _MALICIOUS_MESSAGE
     
     return None
 
+# Agents hold no per-session state (the runner and session service do), so
+# each factory builds its agent once and returns the same instance afterwards
+@lru_cache(maxsize=1)
 def create_tool_secured_weather_agent() -> Agent:
     """
     Create a weather agent with tool-level security using Paris blocking guardrail.
@@ -306,6 +480,7 @@ def create_tool_secured_weather_agent() -> Agent:
         before_tool_callback=block_paris_tool_guardrail
     )
 
+@lru_cache(maxsize=1)
 def create_advanced_secured_weather_agent() -> Agent:
     """
     Create a weather agent with advanced multi-layer tool security.
@@ -325,6 +500,7 @@ def create_advanced_secured_weather_agent() -> Agent:
         before_tool_callback=advanced_tool_security_guardrail
     )
 
+@lru_cache(maxsize=1)
 def create_permissive_secured_weather_agent() -> Agent:
     """
     Create a weather agent with permissive security (only blocks clear threats).
@@ -343,6 +519,7 @@ def create_permissive_secured_weather_agent() -> Agent:
         before_tool_callback=permissive_tool_guardrail
     )
 
+@lru_cache(maxsize=1)
 def create_unsecured_weather_agent() -> Agent:
     """
     Create a weather agent without tool security for comparison.
@@ -361,251 +538,152 @@ def create_unsecured_weather_agent() -> Agent:
         # No before_tool_callback - no tool security
     )
 
-async def test_paris_blocking():
+# Upper bound on queries sent to the model at once by the tests below
+_MAX_CONCURRENT_QUERIES = 8
+
+async def _run_queries(runner: Runner, kind: str, queries) -> list:
     """
-    Test the primary security feature: blocking Paris weather queries.
+    Run queries concurrently, each in its own session.
+    
+    Args:
+        runner: The runner to send the queries to
+        kind: Label used in the session IDs, e.g. "paris"
+        queries: The user messages to send
+    
+    Returns:
+        One result per query, in order, or the exception it raised
     """
-    print("=== Testing Paris Blocking (Primary Security Feature) ===\n")
+    semaphore = asyncio.Semaphore(_MAX_CONCURRENT_QUERIES)
     
-    session_service = InMemorySessionService()
-    agent = create_tool_secured_weather_agent()
+    async def run(i: int, query: str):
+        async with semaphore:
+            return await runner.run_async(
+                session_id=f"{SESSION_ID_TOOL_SECURITY}_{kind}_{i}",
+                user_message=query
+            )
     
-    runner = Runner(
-        agent=agent,
-        app_name=APP_NAME,
-        session_service=session_service
+    return await asyncio.gather(
+        *[run(i, query) for i, query in enumerate(queries, 1)],
+        return_exceptions=True
     )
-    
-    # Test queries that should be blocked
-    paris_queries = [
-        "What's the weather in Paris?",
-        "Can you check Paris weather?",
-        "I need weather information for Paris, France",
-        "How's the weather in PARIS today?",
-        "paris weather please"
-    ]
+
+async def test_paris_blocking(runner: Runner):
+    """
+    Test the primary security feature: blocking Paris weather queries.
+    """
+    print("=== Testing Paris Blocking (Primary Security Feature) ===\n")
     
     print("Testing Paris weather queries (should all be blocked):")
-    for i, query in enumerate(paris_queries, 1):
-        try:
-            result = await runner.run_async(
-                session_id=f"{SESSION_ID_TOOL_SECURITY}_paris_{i}",
-                user_message=query
-            )
-            print(f"Query {i}: {query}")
-            print(f"Response: {result.response}")
-            print("-" * 50)
-        except Exception as e:
-            print(f"❌ Error in Paris query {i}: {str(e)}\n")
+    results = await _run_queries(runner, "paris", _PARIS_QUERIES)
+    for i, (query, result) in enumerate(zip(_PARIS_QUERIES, results), 1):
+        if isinstance(result, Exception):
+            print(f"❌ Error in Paris query {i}: {str(result)}\n")
+            continue
+        print(f"Query {i}: {query}")
+        print(f"Response: {result.response}")
+        print("-" * 50)
 
-async def test_allowed_cities():
+async def test_allowed_cities(runner: Runner):
     """
     Test that non-Paris cities work correctly with tool security.
     """
     print("\n=== Testing Allowed Cities ===\n")
     
-    session_service = InMemorySessionService()
-    agent = create_tool_secured_weather_agent()
-    
-    runner = Runner(
-        agent=agent,
-        app_name=APP_NAME,
-        session_service=session_service
-    )
-    
-    # Test queries that should be allowed
-    allowed_queries = [
-        "What's the weather in Tokyo?",
-        "Can you check London weather?",
-        "How's New York weather today?",
-        "I need weather for Berlin please",
-    ]
-    
     print("Testing allowed city weather queries:")
-    for i, query in enumerate(allowed_queries, 1):
-        try:
-            result = await runner.run_async(
-                session_id=f"{SESSION_ID_TOOL_SECURITY}_allowed_{i}",
-                user_message=query
-            )
-            print(f"Query {i}: {query}")
-            print(f"Response: {result.response}")
-            print("-" * 50)
-        except Exception as e:
-            print(f"❌ Error in allowed query {i}: {str(e)}\n")
+    results = await _run_queries(runner, "allowed", _ALLOWED_QUERIES)
+    for i, (query, result) in enumerate(zip(_ALLOWED_QUERIES, results), 1):
+        if isinstance(result, Exception):
+            print(f"❌ Error in allowed query {i}: {str(result)}\n")
+            continue
+        print(f"Query {i}: {query}")
+        print(f"Response: {result.response}")
+        print("-" * 50)
 
-async def test_advanced_security_features():
+async def test_advanced_security_features(runner: Runner):
     """
     Test advanced security features including permission controls.
     """
     print("\n=== Testing Advanced Security Features ===\n")
     
-    session_service = InMemorySessionService()
-    agent = create_advanced_secured_weather_agent()
-    
-    runner = Runner(
-        agent=agent,
-        app_name=APP_NAME,
-        session_service=session_service
-    )
-    
-    # Test advanced security scenarios
-    test_cases = [
-        # Basic weather should work
-        ("What's the weather in Tokyo?", "Should work - basic weather"),
-        
-        # Detailed weather without forecast should work
-        ("Give me detailed weather for London", "Should work - detailed weather"),
-        
-        # Paris should be blocked
-        ("What's the weather in Paris?", "Should block - Paris restriction"),
-        
-        # Moscow should be blocked (geographic restriction)
-        ("Check weather in Moscow", "Should block - geographic restriction"),
-        
-        # Suspicious city names should be blocked
-        ("Weather for admin-city", "Should block - suspicious pattern"),
-        ("Check debug-location weather", "Should block - suspicious pattern"),
-    ]
-    
     print("Testing advanced security scenarios:")
-    for i, (query, expected) in enumerate(test_cases, 1):
-        try:
-            result = await runner.run_async(
-                session_id=f"{SESSION_ID_TOOL_SECURITY}_advanced_{i}",
-                user_message=query
-            )
-            print(f"Test {i}: {query}")
-            print(f"Expected: {expected}")
-            print(f"Response: {result.response}")
-            print("-" * 50)
-        except Exception as e:
-            print(f"❌ Error in advanced test {i}: {str(e)}\n")
+    results = await _run_queries(runner, "advanced", [query for query, _ in _ADVANCED_CASES])
+    for i, ((query, expected), result) in enumerate(zip(_ADVANCED_CASES, results), 1):
+        if isinstance(result, Exception):
+            print(f"❌ Error in advanced test {i}: {str(result)}\n")
+            continue
+        print(f"Test {i}: {query}")
+        print(f"Expected: {expected}")
+        print(f"Response: {result.response}")
+        print("-" * 50)
 
-async def test_malicious_input_protection():
+async def test_malicious_input_protection(runner: Runner):
     """
     Test protection against malicious tool argument injection.
     """
     print("\n=== Testing Malicious Input Protection ===\n")
     
-    session_service = InMemorySessionService()
-    agent = create_permissive_secured_weather_agent()
-    
-    runner = Runner(
-        agent=agent,
-        app_name=APP_NAME,
-        session_service=session_service
-    )
-    
-    # Test potentially malicious inputs
-    malicious_queries = [
-        "Weather for Tokyo'; DROP TABLE users; --",
-        "Check weather in London<script>alert('xss')</script>",
-        "Weather in javascript:alert('hack')",
-        "City weather: eval('malicious_code')",
-        "exec('rm -rf /') weather in Tokyo",
-    ]
-    
     print("Testing protection against malicious input patterns:")
-    for i, query in enumerate(malicious_queries, 1):
-        try:
-            result = await runner.run_async(
-                session_id=f"{SESSION_ID_TOOL_SECURITY}_malicious_{i}",
-                user_message=query
-            )
-            print(f"Malicious Test {i}: {query}")
-            print(f"Response: {result.response}")
-            print("-" * 50)
-        except Exception as e:
-            print(f"❌ Error in malicious test {i}: {str(e)}\n")
+    results = await _run_queries(runner, "malicious", _MALICIOUS_QUERIES)
+    for i, (query, result) in enumerate(zip(_MALICIOUS_QUERIES, results), 1):
+        if isinstance(result, Exception):
+            print(f"❌ Error in malicious test {i}: {str(result)}\n")
+            continue
+        print(f"Malicious Test {i}: {query}")
+        print(f"Response: {result.response}")
+        print("-" * 50)
 
-async def compare_security_levels():
+async def compare_security_levels(runners_to_test):
     """
     Compare different security levels to show the impact of tool callbacks.
+    
+    Args:
+        runners_to_test: (runner, description) pairs, one per security level
     """
     print("\n=== Comparing Security Levels ===\n")
     
-    session_service = InMemorySessionService()
-    
     # Test query that highlights differences
     test_query = "What's the weather in Paris?"
     
-    agents_to_test = [
-        (create_unsecured_weather_agent(), "Unsecured (No tool security)"),
-        (create_permissive_secured_weather_agent(), "Permissive (Minimal security)"),
-        (create_tool_secured_weather_agent(), "Standard (Paris blocking)"),
-        (create_advanced_secured_weather_agent(), "Advanced (Multi-layer security)"),
-    ]
-    
     print(f"Testing query '{test_query}' across different security levels:\n")
     
-    for agent, description in agents_to_test:
-        print(f"--- {description} ---")
-        
-        runner = Runner(
-            agent=agent,
-            app_name=APP_NAME,
-            session_service=session_service
-        )
-        
-        try:
-            result = await runner.run_async(
-                session_id=f"security_comparison_{agent.name}",
+    # Each agent gets its own session, so the levels can be queried concurrently
+    results = await asyncio.gather(
+        *[
+            runner.run_async(
+                session_id=f"security_comparison_{runner.agent.name}",
                 user_message=test_query
             )
+            for runner, _ in runners_to_test
+        ],
+        return_exceptions=True
+    )
+    
+    for (_, description), result in zip(runners_to_test, results):
+        print(f"--- {description} ---")
+        
+        if isinstance(result, Exception):
+            print(f"❌ Error: {str(result)}")
+        else:
             print(f"Response: {result.response}")
-        except Exception as e:
-            print(f"❌ Error: {str(e)}")
         
         print("-" * 40)
 
-async def test_tool_argument_validation():
+async def test_tool_argument_validation(runner: Runner):
     """
     Test how tool arguments are validated and sanitized.
     """
     print("\n=== Testing Tool Argument Validation ===\n")
     
-    session_service = InMemorySessionService()
-    agent = create_tool_secured_weather_agent()
-    
-    runner = Runner(
-        agent=agent,
-        app_name=APP_NAME,
-        session_service=session_service
-    )
-    
-    # Test edge cases for tool argument validation
-    edge_cases = [
-        # Empty/null inputs
-        ("What's the weather in ?", "Empty city name"),
-        ("Weather for '' please", "Empty string city"),
-        
-        # Very long inputs
-        ("Weather in " + "Tokyo" * 50, "Very long city name"),
-        
-        # Special characters
-        ("Weather in Tokyo; rm -rf /", "City with command injection"),
-        ("Weather in Tokyo' OR '1'='1", "City with SQL injection pattern"),
-        
-        # Case sensitivity
-        ("Weather in PARIS", "Paris in uppercase"),
-        ("Weather in Paris", "Paris in normal case"),
-        ("Weather in paris", "Paris in lowercase"),
-    ]
-    
     print("Testing tool argument validation edge cases:")
-    for i, (query, description) in enumerate(edge_cases, 1):
-        try:
-            result = await runner.run_async(
-                session_id=f"{SESSION_ID_TOOL_SECURITY}_edge_{i}",
-                user_message=query
-            )
-            print(f"Edge Case {i}: {description}")
-            print(f"Query: {query}")
-            print(f"Response: {result.response}")
-            print("-" * 40)
-        except Exception as e:
-            print(f"❌ Error in edge case {i}: {str(e)}\n")
+    results = await _run_queries(runner, "edge", [query for query, _ in _EDGE_CASES])
+    for i, ((query, description), result) in enumerate(zip(_EDGE_CASES, results), 1):
+        if isinstance(result, Exception):
+            print(f"❌ Error in edge case {i}: {str(result)}\n")
+            continue
+        print(f"Edge Case {i}: {description}")
+        print(f"Query: {query}")
+        print(f"Response: {result.response}")
+        print("-" * 40)
 
 async def main():
     """
@@ -615,23 +693,44 @@ async def main():
     print("This step demonstrates tool-level security controls using before_tool_callback")
     print("to validate tool arguments and implement fine-grained access controls.\n")
     
+    # Build the session service and one runner per agent once and share them
+    # across all tests; each query uses its own session_id, so state stays isolated
+    session_service = InMemorySessionService()
+    
+    def make_runner(agent: Agent) -> Runner:
+        return Runner(
+            agent=agent,
+            app_name=APP_NAME,
+            session_service=session_service
+        )
+    
+    tool_secured_runner = make_runner(create_tool_secured_weather_agent())
+    advanced_runner = make_runner(create_advanced_secured_weather_agent())
+    permissive_runner = make_runner(create_permissive_secured_weather_agent())
+    unsecured_runner = make_runner(create_unsecured_weather_agent())
+    
     # Test primary feature: Paris blocking
-    await test_paris_blocking()
+    await test_paris_blocking(tool_secured_runner)
     
     # Test allowed cities work correctly
-    await test_allowed_cities()
+    await test_allowed_cities(tool_secured_runner)
     
     # Test advanced security features
-    await test_advanced_security_features()
+    await test_advanced_security_features(advanced_runner)
     
     # Test malicious input protection
-    await test_malicious_input_protection()
+    await test_malicious_input_protection(permissive_runner)
     
     # Compare different security levels
-    await compare_security_levels()
+    await compare_security_levels([
+        (unsecured_runner, "Unsecured (No tool security)"),
+        (permissive_runner, "Permissive (Minimal security)"),
+        (tool_secured_runner, "Standard (Paris blocking)"),
+        (advanced_runner, "Advanced (Multi-layer security)"),
+    ])
     
     # Test tool argument validation edge cases
-    await test_tool_argument_validation()
+    await test_tool_argument_validation(tool_secured_runner)
     
     print("\n" + "=" * 60)
     print("✅ Step 6 Complete!")
@@ -660,5 +759,5 @@ async def main():
     print("• Build your own multi-agent applications!")
 
 if __name__ == "__main__":
-    # Run the demonstration
-    asyncio.run(main())
+    # Run the demonstration, on uvloop when it is installed
+    run_demo(main())
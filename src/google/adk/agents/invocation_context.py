@@ -23,6 +23,7 @@ from pydantic import ConfigDict
 
 from ..artifacts.base_artifact_service import BaseArtifactService
 from ..memory.base_memory_service import BaseMemoryService
+from ..models.llm_cache import BaseLlmCache
 from ..sessions.base_session_service import BaseSessionService
 from ..sessions.session import Session
 from .active_streaming_tool import ActiveStreamingTool
@@ -115,6 +116,8 @@ class InvocationContext(BaseModel):
   artifact_service: Optional[BaseArtifactService] = None
   session_service: BaseSessionService
   memory_service: Optional[BaseMemoryService] = None
+  llm_cache: Optional[BaseLlmCache] = None
+  """The cache of deterministic LLM responses. None disables caching."""
 
   invocation_id: str
   """The id of this invocation context. Readonly."""
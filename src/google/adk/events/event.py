@@ -96,12 +96,16 @@ class Event(LlmResponse):
     """Returns whether the event is the final response of the agent."""
     if self.actions.skip_summarization or self.long_running_tool_ids:
       return True
-    return (
-        not self.get_function_calls()
-        and not self.get_function_responses()
-        and not self.partial
-        and not self.has_trailing_code_execution_result()
-    )
+    if self.partial:
+      return False
+    if self.content and self.content.parts:
+      # Checked part by part instead of via get_function_calls() and
+      # get_function_responses(), as this runs on every event and doesn't need
+      # the lists they build.
+      for part in self.content.parts:
+        if part.function_call or part.function_response:
+          return False
+    return not self.has_trailing_code_execution_result()
 
   def get_function_calls(self) -> list[types.FunctionCall]:
     """Returns the function calls in the event."""
@@ -36,6 +36,7 @@ from ...agents.run_config import StreamingMode
 from ...agents.transcription_entry import TranscriptionEntry
 from ...events.event import Event
 from ...models.base_llm_connection import BaseLlmConnection
+from ...models.llm_cache import build_cache_key
 from ...models.llm_request import LlmRequest
 from ...models.llm_response import LlmResponse
 from ...telemetry import trace_call_llm
@@ -532,14 +533,38 @@ class BaseLlmFlow(ABC):
           if llm_response.turn_complete:
             invocation_context.live_request_queue.close()
       else:
+        stream = (
+            invocation_context.run_config.streaming_mode == StreamingMode.SSE
+        )
+        llm_cache = invocation_context.llm_cache
+        cache_key = (
+            build_cache_key(llm_request)
+            if llm_cache is not None and not stream
+            else None
+        )
+        if cache_key is not None:
+          if cached_responses := await llm_cache.get(cache_key):
+            logger.debug('LLM cache hit for model %s', llm_request.model)
+            for cached_response in cached_responses:
+              # Runs after_model_callback if it exists.
+              altered_llm_response = await self._handle_after_model_callback(
+                  invocation_context, cached_response, model_response_event
+              )
+              yield altered_llm_response or cached_response
+            return
+
         # Check if we can make this llm call or not. If the current call pushes
         # the counter beyond the max set value, then the execution is stopped
         # right here, and exception is thrown.
         invocation_context.increment_llm_call_count()
+        responses_to_cache = []
+        # When caching, each response is held back until the next one arrives,
+        # so the cache is written before the final response is yielded.
+        # Callers commonly stop iterating at the final response, so code after
+        # the last yield may never run.
+        pending_response = None
         async for llm_response in llm.generate_content_async(
-            llm_request,
-            stream=invocation_context.run_config.streaming_mode
-            == StreamingMode.SSE,
+            llm_request, stream=stream
         ):
           trace_call_llm(
               invocation_context,
@@ -547,13 +572,28 @@ class BaseLlmFlow(ABC):
               llm_request,
               llm_response,
           )
+          if cache_key is not None:
+            # Copied before after_model_callback can alter the response.
+            responses_to_cache.append(llm_response.model_copy(deep=True))
           # Runs after_model_callback if it exists.
           if altered_llm_response := await self._handle_after_model_callback(
               invocation_context, llm_response, model_response_event
           ):
             llm_response = altered_llm_response
 
-          yield llm_response
+          if cache_key is None:
+            yield llm_response
+            continue
+          if pending_response is not None:
+            yield pending_response
+          pending_response = llm_response
+
+        if responses_to_cache and not any(
+            response.error_code for response in responses_to_cache
+        ):
+          await llm_cache.set(cache_key, responses_to_cache)
+        if pending_response is not None:
+          yield pending_response
 
   async def _handle_before_model_callback(
       self,
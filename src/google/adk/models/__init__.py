@@ -16,13 +16,17 @@
 
 from .base_llm import BaseLlm
 from .google_llm import Gemini
+from .llm_cache import BaseLlmCache
+from .llm_cache import InMemoryLlmCache
 from .llm_request import LlmRequest
 from .llm_response import LlmResponse
 from .registry import LLMRegistry
 
 __all__ = [
     'BaseLlm',
+    'BaseLlmCache',
     'Gemini',
+    'InMemoryLlmCache',
     'LLMRegistry',
 ]
 
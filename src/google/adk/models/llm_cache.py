@@ -0,0 +1,139 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+
+from abc import ABC
+from abc import abstractmethod
+import collections
+import hashlib
+import json
+import logging
+import time
+from typing import Optional
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+  from .llm_request import LlmRequest
+  from .llm_response import LlmResponse
+
+logger = logging.getLogger('google_adk.' + __name__)
+
+
+def build_cache_key(llm_request: LlmRequest) -> Optional[str]:
+  """Builds the cache key of an LLM request.
+
+  Only deterministic requests, i.e. requests with `temperature` explicitly set
+  to 0, are cacheable. The key covers the model, the contents and the whole
+  generate content config, which includes the system instruction and the tool
+  declarations.
+
+  Args:
+    llm_request: The LLM request to build the key for.
+
+  Returns:
+    The hex digest of the request, or None if the request is not cacheable.
+  """
+  config = llm_request.config
+  if config is None or config.temperature != 0:
+    return None
+  try:
+    payload = {
+        'model': llm_request.model,
+        'contents': [
+            content.model_dump(mode='json', exclude_none=True)
+            for content in llm_request.contents
+        ],
+        'config': config.model_dump(mode='json', exclude_none=True),
+    }
+    serialized = json.dumps(payload, sort_keys=True)
+  except (TypeError, ValueError) as e:
+    # E.g. a response schema given as a Python type.
+    logger.debug('LLM request is not cacheable: %s', e)
+    return None
+  return hashlib.sha256(serialized.encode('utf-8')).hexdigest()
+
+
+class BaseLlmCache(ABC):
+  """Base class for caches of LLM responses."""
+
+  @abstractmethod
+  async def get(self, key: str) -> Optional[list[LlmResponse]]:
+    """Gets the cached responses of a request.
+
+    Args:
+      key: The cache key of the request, see `build_cache_key`.
+
+    Returns:
+      The responses previously stored for the key, or None on a cache miss.
+    """
+
+  @abstractmethod
+  async def set(self, key: str, responses: list[LlmResponse]) -> None:
+    """Stores the responses of a request.
+
+    Args:
+      key: The cache key of the request, see `build_cache_key`.
+      responses: The responses the model returned for the request.
+    """
+
+
+class InMemoryLlmCache(BaseLlmCache):
+  """An in-memory LRU cache of LLM responses.
+
+  This is useful for replaying the same conversations, e.g. in tests, evals or
+  tutorials, without calling the model again.
+  """
+
+  def __init__(
+      self, *, max_entries: int = 256, ttl_seconds: Optional[float] = None
+  ):
+    """Initializes the InMemoryLlmCache.
+
+    Args:
+      max_entries: The maximum number of cached requests. The least recently
+        used entry is evicted first.
+      ttl_seconds: How long an entry stays valid. None means forever.
+    """
+    if max_entries <= 0:
+      raise ValueError('max_entries must be a positive number.')
+    self.max_entries = max_entries
+    self.ttl_seconds = ttl_seconds
+    # A map from cache key to the insertion time and the cached responses.
+    self._entries: collections.OrderedDict[
+        str, tuple[float, list[LlmResponse]]
+    ] = collections.OrderedDict()
+
+  async def get(self, key: str) -> Optional[list[LlmResponse]]:
+    entry = self._entries.get(key)
+    if entry is None:
+      return None
+
+    created_at, responses = entry
+    if (
+        self.ttl_seconds is not None
+        and time.time() - created_at > self.ttl_seconds
+    ):
+      del self._entries[key]
+      return None
+
+    self._entries.move_to_end(key)
+    # Callers, e.g. after_model_callbacks, may mutate the responses.
+    return [response.model_copy(deep=True) for response in responses]
+
+  async def set(self, key: str, responses: list[LlmResponse]) -> None:
+    self._entries[key] = (time.time(), list(responses))
+    self._entries.move_to_end(key)
+    while len(self._entries) > self.max_entries:
+      self._entries.popitem(last=False)
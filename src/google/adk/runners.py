@@ -38,6 +38,7 @@ from .code_executors.built_in_code_executor import BuiltInCodeExecutor
 from .events.event import Event
 from .memory.base_memory_service import BaseMemoryService
 from .memory.in_memory_memory_service import InMemoryMemoryService
+from .models.llm_cache import BaseLlmCache
 from .sessions.base_session_service import BaseSessionService
 from .sessions.in_memory_session_service import InMemorySessionService
 from .sessions.session import Session
@@ -60,6 +61,7 @@ class Runner:
       artifact_service: The artifact service for the runner.
       session_service: The session service for the runner.
       memory_service: The memory service for the runner.
+      llm_cache: The cache of deterministic LLM responses for the runner.
   """
 
   app_name: str
@@ -72,6 +74,8 @@ class Runner:
   """The session service for the runner."""
   memory_service: Optional[BaseMemoryService] = None
   """The memory service for the runner."""
+  llm_cache: Optional[BaseLlmCache] = None
+  """The cache of deterministic LLM responses for the runner."""
 
   def __init__(
       self,
@@ -81,6 +85,7 @@ class Runner:
       artifact_service: Optional[BaseArtifactService] = None,
       session_service: BaseSessionService,
       memory_service: Optional[BaseMemoryService] = None,
+      llm_cache: Optional[BaseLlmCache] = None,
   ):
     """Initializes the Runner.
 
@@ -90,12 +95,15 @@ class Runner:
         artifact_service: The artifact service for the runner.
         session_service: The session service for the runner.
         memory_service: The memory service for the runner.
+        llm_cache: The cache of LLM responses for the runner. Only requests
+          with temperature 0 are cached.
     """
     self.app_name = app_name
     self.agent = agent
     self.artifact_service = artifact_service
     self.session_service = session_service
     self.memory_service = memory_service
+    self.llm_cache = llm_cache
 
   def run(
       self,
@@ -417,6 +425,7 @@ class Runner:
         artifact_service=self.artifact_service,
         session_service=self.session_service,
         memory_service=self.memory_service,
+        llm_cache=self.llm_cache,
         invocation_id=invocation_id,
         agent=self.agent,
         session=session,
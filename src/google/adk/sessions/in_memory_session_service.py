@@ -12,6 +12,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import collections
 import copy
 import logging
 import time
@@ -30,6 +31,9 @@ from .state import State
 
 logger = logging.getLogger('google_adk.' + __name__)
 
+# The maximum number of deleted sessions kept around for reuse.
+_MAX_POOL = 64
+
 
 class InMemorySessionService(BaseSessionService):
   """An in-memory implementation of the session service."""
@@ -42,6 +46,8 @@ class InMemorySessionService(BaseSessionService):
     self.user_state: dict[str, dict[str, dict[str, Any]]] = {}
     # A map from app name to a map from key to the value.
     self.app_state: dict[str, dict[str, Any]] = {}
+    # Deleted storage sessions, reset and ready to back new sessions.
+    self._freelist: collections.deque[Session] = collections.deque()
 
   @override
   async def create_session(
@@ -88,13 +94,21 @@ class InMemorySessionService(BaseSessionService):
         if session_id and session_id.strip()
         else str(uuid.uuid4())
     )
-    session = Session(
-        app_name=app_name,
-        user_id=user_id,
-        id=session_id,
-        state=state or {},
-        last_update_time=time.time(),
-    )
+    if self._freelist:
+      session = self._freelist.pop()
+      session.app_name = app_name
+      session.user_id = user_id
+      session.id = session_id
+      session.state.update(state or {})
+      session.last_update_time = time.time()
+    else:
+      session = Session(
+          app_name=app_name,
+          user_id=user_id,
+          id=session_id,
+          state=state or {},
+          last_update_time=time.time(),
+      )
 
     if app_name not in self.sessions:
       self.sessions[app_name] = {}
@@ -249,7 +263,12 @@ class InMemorySessionService(BaseSessionService):
     ):
       return None
 
-    self.sessions[app_name][user_id].pop(session_id)
+    session = self.sessions[app_name][user_id].pop(session_id)
+    # Callers only ever see copies, so the storage session can be recycled.
+    if len(self._freelist) < _MAX_POOL:
+      session.state.clear()
+      session.events.clear()
+      self._freelist.append(session)
 
   @override
   async def append_event(self, session: Session, event: Event) -> Event:
@@ -16,6 +16,7 @@ import inspect
 from typing import Any
 from typing import Callable
 from typing import Optional
+import weakref
 
 from google.genai import types
 from typing_extensions import override
@@ -24,6 +25,13 @@ from ._automatic_function_calling_util import build_function_declaration
 from .base_tool import BaseTool
 from .tool_context import ToolContext
 
+# A map from the wrapped function to its declarations, keyed by the api variant
+# and the ignored params. FunctionTools are rebuilt from the same functions on
+# every LLM call, so this saves re-inspecting the signature each time.
+_declaration_cache: weakref.WeakKeyDictionary[
+    Callable[..., Any], dict[tuple[Any, ...], types.FunctionDeclaration]
+] = weakref.WeakKeyDictionary()
+
 
 class FunctionTool(BaseTool):
   """A tool that wraps a user-defined Python function.
@@ -61,17 +69,28 @@ class FunctionTool(BaseTool):
 
   @override
   def _get_declaration(self) -> Optional[types.FunctionDeclaration]:
-    function_decl = types.FunctionDeclaration.model_validate(
-        build_function_declaration(
-            func=self.func,
-            # The model doesn't understand the function context.
-            # input_stream is for streaming tool
-            ignore_params=self._ignore_params,
-            variant=self._api_variant,
-        )
-    )
-
-    return function_decl
+    variant = self._api_variant
+    cache_key = (variant, tuple(self._ignore_params))
+    try:
+      cached_decls = _declaration_cache.setdefault(self.func, {})
+    except TypeError:
+      # The function is unhashable or doesn't support weak references.
+      cached_decls = {}
+
+    if (function_decl := cached_decls.get(cache_key)) is None:
+      function_decl = types.FunctionDeclaration.model_validate(
+          build_function_declaration(
+              func=self.func,
+              # The model doesn't understand the function context.
+              # input_stream is for streaming tool
+              ignore_params=self._ignore_params,
+              variant=variant,
+          )
+      )
+      cached_decls[cache_key] = function_decl
+
+    # Subclasses and request processors may modify the returned declaration.
+    return function_decl.model_copy(deep=True)
 
   @override
   async def run_async(
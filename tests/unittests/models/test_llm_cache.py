@@ -0,0 +1,151 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from unittest import mock
+
+from google.adk.agents import Agent
+from google.adk.models.llm_cache import build_cache_key
+from google.adk.models.llm_cache import InMemoryLlmCache
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+import pytest
+
+from .. import testing_utils
+
+
+def _request(text: str, temperature=0.0) -> LlmRequest:
+  return LlmRequest(
+      model='mock',
+      contents=[testing_utils.UserContent(text)],
+      config=types.GenerateContentConfig(temperature=temperature),
+  )
+
+
+def _response(text: str) -> LlmResponse:
+  return LlmResponse(
+      content=testing_utils.ModelContent([types.Part(text=text)])
+  )
+
+
+def test_build_cache_key_is_stable():
+  assert build_cache_key(_request('hi')) == build_cache_key(_request('hi'))
+  assert build_cache_key(_request('hi')) != build_cache_key(_request('bye'))
+
+
+@pytest.mark.parametrize('temperature', [None, 0.5])
+def test_build_cache_key_skips_non_deterministic_requests(temperature):
+  assert build_cache_key(_request('hi', temperature=temperature)) is None
+
+
+@pytest.mark.asyncio
+async def test_in_memory_llm_cache_evicts_least_recently_used():
+  cache = InMemoryLlmCache(max_entries=2)
+  await cache.set('a', [_response('a')])
+  await cache.set('b', [_response('b')])
+  assert await cache.get('a')
+  await cache.set('c', [_response('c')])
+
+  assert await cache.get('b') is None
+  assert (await cache.get('a'))[0].content.parts[0].text == 'a'
+  assert (await cache.get('c'))[0].content.parts[0].text == 'c'
+
+
+@pytest.mark.asyncio
+async def test_in_memory_llm_cache_expires_entries():
+  cache = InMemoryLlmCache(ttl_seconds=10)
+  with mock.patch('time.time', return_value=100.0):
+    await cache.set('a', [_response('a')])
+  with mock.patch('time.time', return_value=105.0):
+    assert await cache.get('a')
+  with mock.patch('time.time', return_value=111.0):
+    assert await cache.get('a') is None
+
+
+@pytest.mark.asyncio
+async def test_in_memory_llm_cache_returns_copies():
+  cache = InMemoryLlmCache()
+  await cache.set('a', [_response('a')])
+  (await cache.get('a'))[0].content.parts[0].text = 'altered'
+
+  assert (await cache.get('a'))[0].content.parts[0].text == 'a'
+
+
+@pytest.mark.asyncio
+async def test_runner_serves_repeated_request_from_cache():
+  mock_model = testing_utils.MockModel.create(responses=['response1'])
+  agent = Agent(
+      name='root_agent',
+      model=mock_model,
+      generate_content_config=types.GenerateContentConfig(temperature=0),
+  )
+  session_service = InMemorySessionService()
+  runner = Runner(
+      app_name='test_app',
+      agent=agent,
+      session_service=session_service,
+      llm_cache=InMemoryLlmCache(),
+  )
+
+  texts = []
+  for _ in range(2):
+    session = await session_service.create_session(
+        app_name='test_app', user_id='test_user'
+    )
+    async for event in runner.run_async(
+        user_id='test_user',
+        session_id=session.id,
+        new_message=testing_utils.UserContent('hi'),
+    ):
+      texts.append(event.content.parts[0].text)
+
+  assert texts == ['response1', 'response1']
+  assert mock_model.response_index == 0
+
+
+@pytest.mark.asyncio
+async def test_runner_caches_when_caller_stops_at_final_response():
+  mock_model = testing_utils.MockModel.create(responses=['r1', 'r2'])
+  agent = Agent(
+      name='root_agent',
+      model=mock_model,
+      generate_content_config=types.GenerateContentConfig(temperature=0),
+  )
+  session_service = InMemorySessionService()
+  llm_cache = InMemoryLlmCache()
+  runner = Runner(
+      app_name='test_app',
+      agent=agent,
+      session_service=session_service,
+      llm_cache=llm_cache,
+  )
+
+  texts = []
+  for _ in range(2):
+    session = await session_service.create_session(
+        app_name='test_app', user_id='test_user'
+    )
+    async for event in runner.run_async(
+        user_id='test_user',
+        session_id=session.id,
+        new_message=testing_utils.UserContent('hi'),
+    ):
+      if event.is_final_response():
+        texts.append(event.content.parts[0].text)
+        break
+
+  assert texts == ['r1', 'r1']
+  assert mock_model.response_index == 0
@@ -377,3 +377,46 @@ async def test_get_session_with_config(service_type):
   )
   events = session.events
   assert len(events) == num_test_events - after_timestamp + 1
+
+
+@pytest.mark.asyncio
+async def test_in_memory_session_service_reuses_deleted_sessions():
+  session_service = InMemorySessionService()
+  app_name = 'my_app'
+  user_id = 'test_user'
+
+  session = await session_service.create_session(
+      app_name=app_name, user_id=user_id, state={'key': 'value'}
+  )
+  event = Event(invocation_id='invocation', author='user')
+  await session_service.append_event(session=session, event=event)
+  stored_session = session_service.sessions[app_name][user_id][session.id]
+  assert stored_session.events
+  await session_service.delete_session(
+      app_name=app_name, user_id=user_id, session_id=session.id
+  )
+  assert list(session_service._freelist) == [stored_session]
+
+  new_session = await session_service.create_session(
+      app_name=app_name,
+      user_id='other_user',
+      state={'new_key': 'new_value'},
+      session_id='new_session',
+  )
+  assert not session_service._freelist
+  recycled_session = session_service.sessions[app_name]['other_user'][
+      'new_session'
+  ]
+  assert recycled_session is stored_session
+  assert recycled_session.state == {'new_key': 'new_value'}
+  assert not recycled_session.events
+  assert new_session.user_id == 'other_user'
+  assert new_session.id == 'new_session'
+  assert new_session.state == {'new_key': 'new_value'}
+  assert not new_session.events
+  assert (
+      await session_service.get_session(
+          app_name=app_name, user_id='other_user', session_id='new_session'
+      )
+      == new_session
+  )
@@ -13,7 +13,9 @@
 # limitations under the License.
 
 from unittest.mock import MagicMock
+from unittest.mock import patch
 
+from google.adk.tools._automatic_function_calling_util import build_function_declaration
 from google.adk.tools.function_tool import FunctionTool
 import pytest
 
@@ -294,3 +296,23 @@ async def test_run_async_with_optional_args_not_set_async_func():
   args = {"arg1": "test_value_1", "arg3": "test_value_3"}
   result = await tool.run_async(args=args, tool_context=MagicMock())
   assert result == "test_value_1,test_value_3"
+
+
+def test_get_declaration_is_cached_per_function():
+  """Test that the declaration is built once and copied for each tool."""
+
+  def function_to_cache(arg1: str) -> str:
+    """Function for testing the declaration cache."""
+    return arg1
+
+  with patch(
+      "google.adk.tools.function_tool.build_function_declaration",
+      wraps=build_function_declaration,
+  ) as mock_build:
+    declaration = FunctionTool(function_to_cache)._get_declaration()
+    declaration.description = "altered"
+    cached_declaration = FunctionTool(function_to_cache)._get_declaration()
+
+  mock_build.assert_called_once()
+  assert cached_declaration.name == "function_to_cache"
+  assert cached_declaration.description != "altered"